@@ -4,12 +4,18 @@ from flask_restful import Api
 from flask_uploads import configure_uploads, patch_request_class
 
 from config import Config
-from extensions import db, jwt, image_set
+from hashing import passwords
+from instrumentation import instrumentation
+from revocation import revoked_tokens
+from user_cache import user_cache
+from extensions import db, jwt, image_set, cache
+from serializers import output_json
 
 
 from resources.user import UserListResource, UserResource, MeResource, UserRecipeListResource, UserActivateResource, UserAvatarUploadResource
-from resources.token import TokenResource, RefreshResource, RevokeResource, black_list
-from resources.blog import RecipeListResource, RecipeResource, RecipePublishResource, RecipeCoverUploadResource
+from resources.token import TokenResource, RefreshResource, RevokeResource
+from resources.blog import RecipeListResource, RecipeBulkResource, RecipeBulkPublishResource, RecipeExportResource, RecipeSearchResource, RecipeResource, RecipePublishResource, RecipeCoverUploadResource
+from resources.image_job import ImageJobResource
 
 import os
 
@@ -20,13 +26,13 @@ def create_app():
         config_str = 'config.ProductionConfig'
     elif env == 'Staging':
         config_str = 'config.StagingConfig'
+    elif env == 'Testing':
+        config_str = 'config.TestingConfig'
     else:
         config_str = 'config.DevelopmentConfig'
     app = Flask(__name__)
     app.config.from_object(config_str)
 
-    app.app_context().push()
-
     register_extensions(app)
     register_resources(app)
 
@@ -38,15 +44,21 @@ def register_extensions(app):
     jwt.init_app(app)
     configure_uploads(app, image_set)
     patch_request_class(app, 10 * 1024 * 1024)
+    cache.init_app(app)
+    revoked_tokens.init_app(app)
+    user_cache.init_app(app)
+    passwords.init_app(app)
+    instrumentation.init_app(app)
 
     @jwt.token_in_blacklist_loader
     def check_if_token_in_blacklist(decrypted_token):
         jti = decrypted_token['jti']
-        return jti in black_list
+        return revoked_tokens.is_revoked(jti)
 
 
 def register_resources(app):
     api = Api(app)
+    api.representation('application/json')(output_json)
 
     api.add_resource(UserListResource, '/users')
     api.add_resource(UserActivateResource, '/users/activate/<string:token>')
@@ -61,10 +73,16 @@ def register_resources(app):
     api.add_resource(RevokeResource, '/revoke')
 
     api.add_resource(RecipeListResource, '/recipes')
+    api.add_resource(RecipeBulkResource, '/recipes/bulk')
+    api.add_resource(RecipeBulkPublishResource, '/recipes/bulk/publish')
+    api.add_resource(RecipeExportResource, '/recipes/export')
+    api.add_resource(RecipeSearchResource, '/recipes/search')
     api.add_resource(RecipeResource, '/recipes/<int:recipe_id>')
     api.add_resource(RecipePublishResource, '/recipes/<int:recipe_id>/publish')
     api.add_resource(RecipeCoverUploadResource, '/recipes/<int:recipe_id>/cover')
 
+    api.add_resource(ImageJobResource, '/images/jobs/<string:job_id>')
+
 
 if __name__ == '__main__':
     app = create_app()
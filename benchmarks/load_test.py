@@ -0,0 +1,72 @@
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def run(url, method, json_data, concurrency, duration):
+    deadline = time.monotonic() + duration
+    local = threading.local()
+    counts = {'ok': 0, 'errors': 0}
+    lock = threading.Lock()
+
+    def worker():
+        session = getattr(local, 'session', None)
+
+        if session is None:
+            session = local.session = requests.Session()
+
+        ok = errors = 0
+
+        while time.monotonic() < deadline:
+            try:
+                response = session.request(method, url, json=json_data, timeout=30)
+            except requests.RequestException:
+                errors += 1
+                continue
+
+            if response.status_code < 400:
+                ok += 1
+            else:
+                errors += 1
+
+        with lock:
+            counts['ok'] += ok
+            counts['errors'] += errors
+
+    started = time.monotonic()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(worker)
+
+    elapsed = time.monotonic() - started
+
+    return counts['ok'] / elapsed, counts['errors']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure throughput of the recipe list and login endpoints.')
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--email', help='login with this account; the login endpoint is skipped if omitted')
+    parser.add_argument('--password')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=20)
+    args = parser.parse_args()
+
+    base_url = args.url.rstrip('/')
+
+    targets = [('GET /recipes', base_url + '/recipes', 'GET', None)]
+
+    if args.email:
+        targets.append(('POST /token', base_url + '/token', 'POST', {'email': args.email, 'password': args.password}))
+
+    for name, url, method, json_data in targets:
+        throughput, errors = run(url, method, json_data, concurrency=args.concurrency, duration=args.duration)
+        print('{:<14} {:>9.1f} req/s {:>6} errors'.format(name, throughput, errors))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import current_app
+
+from app import create_app
+from extensions import db
+from models.blog import Recipe
+from models.user import User
+from schemas.blog import RECIPE_FIELDS, get_recipe_schema
+from serializers import dump_recipes
+
+FIELD_SETS = [
+    None,
+    ('id', 'name'),
+    ('name', 'author', 'cover_url'),
+    ('cover_urls', 'created_at', 'updated_at', 'is_publish'),
+    RECIPE_FIELDS,
+]
+
+
+def seed(count):
+    sizes = current_app.config['IMAGE_RENDITION_SIZES']
+    now = datetime(2020, 1, 1)
+
+    users = [User(username='user{}'.format(i), email='user{}@example.com'.format(i), password='x', is_active=True,
+                  created_at=now, updated_at=now) for i in range(10)]
+    users[1].avatar_image = 'avatar.jpg'
+    users[2].avatar_image = 'avatar.jpg'
+    users[2].avatar_renditions = make_renditions('avatar', sizes)
+    db.session.add_all(users)
+    db.session.flush()
+
+    for i in range(count):
+        recipe = Recipe(name='Recipe {}'.format(i), description='Description {}'.format(i), num_of_servings=i % 10 + 1,
+                        cook_time=i % 60 + 1 if i % 7 else None, directions='Directions', is_publish=True,
+                        user_id=users[i % len(users)].id if i % 11 else None,
+                        created_at=now + timedelta(minutes=i), updated_at=now + timedelta(minutes=i))
+
+        if i % 3 == 1:
+            recipe.cover_image = 'cover{}.jpg'.format(i)
+        elif i % 3 == 2:
+            recipe.cover_image = 'cover{}.jpg'.format(i)
+            recipe.cover_renditions = make_renditions('cover{}'.format(i), sizes)
+
+        db.session.add(recipe)
+
+    db.session.commit()
+
+
+def make_renditions(name, sizes):
+    return {str(size): {'jpeg': '{}_{}.jpg'.format(name, size), 'webp': '{}_{}.webp'.format(name, size)}
+            for size in sizes}
+
+
+def load_objects(limit):
+    query = Recipe.with_author(Recipe.query_published())
+    return query.order_by(Recipe.created_at.desc(), Recipe.id.desc()).limit(limit).all()
+
+
+def load_rows(limit, fields):
+    query = Recipe.select_fields(Recipe.query_published(), fields=fields)
+    return query.order_by(Recipe.created_at.desc(), Recipe.id.desc()).limit(limit).all()
+
+
+def check_parity(limit):
+    for fields in FIELD_SETS:
+        for path in ('/recipes', '/recipes?size=200'):
+            with current_app.test_request_context(path):
+                expected = get_recipe_schema(fields, many=True).dump(load_objects(limit))
+                actual = dump_recipes(load_rows(limit, fields), fields)
+
+                assert expected == actual, (fields, path)
+                assert [list(item) for item in expected['data']] == [list(item) for item in actual['data']]
+
+
+def main(count=1000, limit=100, number=20):
+    app = create_app()
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('BENCHMARK_DATABASE_URL', 'sqlite://')
+
+    if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql'):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {}
+
+    with app.app_context():
+        db.create_all()
+        seed(count)
+
+        check_parity(limit)
+        print('parity ok for {} field sets'.format(len(FIELD_SETS)))
+
+        with app.test_request_context('/recipes'):
+            schema = get_recipe_schema(None, many=True)
+
+            timings = (
+                ('marshmallow', lambda: schema.dump(load_objects(limit))),
+                ('rows', lambda: dump_recipes(load_rows(limit, None))),
+            )
+
+            for name, run in timings:
+                seconds = timeit.timeit(run, number=number) / number
+                print('{:<12} {:>8.2f} ms per page of {} recipes'.format(name, seconds * 1000, limit))
+
+        db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
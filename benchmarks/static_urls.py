@@ -0,0 +1,91 @@
+import os
+import sys
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import current_app, request, url_for
+
+from app import create_app
+from models.blog import Recipe
+from models.user import User
+from schemas.blog import RecipeSchema
+from utils import select_rendition
+
+
+class UrlForRecipeSchema(RecipeSchema):
+
+    def dump_cover_url(self, recipe):
+        if recipe.cover_image:
+            size = request.args.get('size', type=int)
+            filename = select_rendition(recipe.cover_renditions, size) or recipe.cover_image
+            return url_for('static', filename='images/recipes/{}'.format(filename), _external=True)
+        else:
+            return url_for('static', filename='images/assets/default-recipe-cover.jpg', _external=True)
+
+    def dump_cover_urls(self, recipe):
+        if recipe.cover_image and not recipe.cover_renditions:
+            fallback = url_for('static', filename='images/recipes/{}'.format(recipe.cover_image), _external=True)
+        else:
+            fallback = url_for('static', filename='images/assets/default-recipe-cover.jpg', _external=True)
+
+        urls = {}
+
+        for size in sorted(current_app.config['IMAGE_RENDITION_SIZES']):
+            formats = (recipe.cover_renditions or {}).get(str(size))
+
+            if formats:
+                urls[str(size)] = {image_format: url_for('static', filename='images/recipes/{}'.format(filename),
+                                                         _external=True)
+                                   for image_format, filename in formats.items()}
+            else:
+                urls[str(size)] = {'jpeg': fallback, 'webp': None}
+
+        return urls
+
+
+def make_renditions(name, sizes):
+    return {str(size): {'jpeg': '{}_{}.jpg'.format(name, size), 'webp': '{}_{}.webp'.format(name, size)}
+            for size in sizes}
+
+
+def make_recipes(count, sizes):
+    now = datetime.utcnow()
+    author = User(id=1, username='author', email='author@example.com', created_at=now, updated_at=now)
+
+    recipes = []
+
+    for i in range(count):
+        recipe = Recipe(id=i, name='Recipe {}'.format(i), description='Description', num_of_servings=2, cook_time=30,
+                        directions='Directions', is_publish=True, created_at=now, updated_at=now)
+
+        if i % 2:
+            name = '{:032x}'.format(i)
+            recipe.cover_image = '{}.jpg'.format(name)
+            recipe.cover_renditions = make_renditions(name, sizes)
+
+        recipe.user = author
+        recipes.append(recipe)
+
+    return recipes
+
+
+def main(count=1000, number=20):
+    app = create_app()
+    recipes = make_recipes(count, app.config['IMAGE_RENDITION_SIZES'])
+
+    fields = ('id', 'name', 'cover_url', 'cover_urls')
+    baseline = UrlForRecipeSchema(only=fields, many=True)
+    optimized = RecipeSchema(only=fields, many=True)
+
+    with app.test_request_context('/recipes?size=256'):
+        assert baseline.dump(recipes) == optimized.dump(recipes)
+
+        for name, schema in (('url_for', baseline), ('static_url', optimized)):
+            seconds = timeit.timeit(lambda: schema.dump(recipes), number=number) / number
+            print('{:<12} {:>8.2f} ms per dump of {} recipes'.format(name, seconds * 1000, count))
+
+
+if __name__ == '__main__':
+    main()
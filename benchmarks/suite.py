@@ -0,0 +1,348 @@
+import argparse
+import io
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PASSWORD = 'benchmark-password'
+PLACEHOLDER = re.compile(r'{(\w+)}')
+
+
+class Dataset:
+
+    def __init__(self, usernames, emails, recipes_by_user, published_ids, tokens):
+        self.usernames = usernames
+        self.emails = emails
+        self.recipes_by_user = recipes_by_user
+        self.published_ids = published_ids
+        self.tokens = tokens
+
+    def context(self, rng):
+        user_id = rng.choice(list(self.recipes_by_user))
+
+        return user_id, {
+            'user_id': user_id,
+            'username': self.usernames[user_id],
+            'email': self.emails[user_id],
+            'password': PASSWORD,
+            'recipe_id': rng.choice(self.published_ids),
+            'own_recipe_id': rng.choice(self.recipes_by_user[user_id]),
+        }
+
+
+def seed(app, users, recipes, rng):
+    from extensions import db
+    from models.blog import Recipe
+    from models.user import User
+    from utils import hash_password
+
+    password = hash_password(PASSWORD)
+    now = datetime.utcnow()
+
+    db.session.bulk_insert_mappings(User, [
+        {'username': 'user{}'.format(i), 'email': 'user{}@example.com'.format(i), 'password': password,
+         'is_active': True, 'created_at': now, 'updated_at': now}
+        for i in range(users)
+    ])
+    db.session.commit()
+
+    user_ids = sorted(user_id for user_id, in db.session.query(User.id))
+
+    rows = []
+
+    for i in range(recipes):
+        created_at = now - timedelta(minutes=recipes - i)
+        rows.append({
+            'name': 'Recipe {}'.format(i),
+            'description': 'Synthetic recipe number {}'.format(i),
+            'num_of_servings': rng.randint(1, 12),
+            'cook_time': rng.randint(5, 240),
+            'directions': 'Mix everything and cook for a while. ' * rng.randint(1, 10),
+            'is_publish': rng.random() < 0.8,
+            'user_id': user_ids[i % len(user_ids)],
+            'created_at': created_at,
+            'updated_at': created_at,
+        })
+
+    for start in range(0, len(rows), 1000):
+        db.session.bulk_insert_mappings(Recipe, rows[start:start + 1000])
+        db.session.commit()
+
+    return load_dataset(app)
+
+
+def load_dataset(app):
+    from flask_jwt_extended import create_access_token
+
+    from extensions import db
+    from models.blog import Recipe
+    from models.user import User
+
+    usernames = dict(db.session.query(User.id, User.username))
+    emails = dict(db.session.query(User.id, User.email))
+    recipes_by_user = defaultdict(list)
+    published_ids = []
+
+    for recipe_id, user_id, is_publish in db.session.query(Recipe.id, Recipe.user_id, Recipe.is_publish):
+        if user_id is not None:
+            recipes_by_user[user_id].append(recipe_id)
+        if is_publish:
+            published_ids.append(recipe_id)
+
+    with app.test_request_context():
+        tokens = {user_id: create_access_token(identity=user_id) for user_id in recipes_by_user}
+
+    return Dataset(usernames, emails, dict(recipes_by_user), published_ids, tokens)
+
+
+def reset_database(app):
+    from extensions import db
+
+    db.drop_all()
+
+    if db.engine.dialect.name == 'postgresql':
+        from flask_migrate import upgrade
+
+        db.engine.execute('DROP TABLE IF EXISTS alembic_version')
+        upgrade(directory=os.path.join(os.path.dirname(BENCHMARK_DIR), 'migrations'))
+    else:
+        db.create_all()
+
+
+def load_traffic(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def fill(value, context):
+    if isinstance(value, str):
+        return PLACEHOLDER.sub(lambda match: str(context[match.group(1)]), value)
+    if isinstance(value, dict):
+        return {key: fill(item, context) for key, item in value.items()}
+    if isinstance(value, list):
+        return [fill(item, context) for item in value]
+    return value
+
+
+def make_image(rng):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new('RGB', (rng.randint(400, 1600), rng.randint(400, 1200)),
+              tuple(rng.randint(0, 255) for _ in range(3))).save(buffer, 'JPEG')
+    buffer.seek(0)
+
+    return buffer
+
+
+def send(client, spec, dataset, rng):
+    user_id, context = dataset.context(rng)
+
+    headers = {}
+
+    if spec.get('auth'):
+        headers['Authorization'] = 'Bearer {}'.format(dataset.tokens[user_id])
+
+    kwargs = {'headers': headers}
+
+    if 'json' in spec:
+        kwargs['json'] = fill(spec['json'], context)
+
+    if 'files' in spec:
+        kwargs['data'] = {field: (make_image(rng), 'benchmark.jpg') for field in spec['files']}
+        kwargs['content_type'] = 'multipart/form-data'
+
+    return client.open(fill(spec['path'], context), method=spec.get('method', 'GET'), **kwargs)
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))
+
+    return ordered[index]
+
+
+def replay(app, traffic, dataset, requests, concurrency, seed_value):
+    from extensions import db
+    from instrumentation import count_queries
+
+    rng = random.Random(seed_value)
+    weights = [spec.get('weight', 1) for spec in traffic]
+    plan = rng.choices(range(len(traffic)), weights=weights, k=requests)
+
+    samples = defaultdict(list)
+    lock = threading.Lock()
+    position = iter(plan)
+
+    with app.app_context():
+        engine = db.engine
+
+    def worker(index):
+        client = app.test_client()
+        worker_rng = random.Random(seed_value + index)
+
+        while True:
+            with lock:
+                spec_index = next(position, None)
+
+            if spec_index is None:
+                return
+
+            spec = traffic[spec_index]
+            queries = counter.thread_count
+            started = time.perf_counter()
+
+            try:
+                response = send(client, spec, dataset, worker_rng)
+                status = response.status_code
+            except Exception:
+                status = 599
+
+            elapsed = time.perf_counter() - started
+
+            with lock:
+                samples[spec['name']].append((elapsed, status, counter.thread_count - queries))
+
+    started = time.perf_counter()
+
+    with count_queries(engine) as counter, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, range(concurrency)))
+
+    return samples, time.perf_counter() - started
+
+
+def summarize(samples, elapsed):
+    endpoints = {}
+
+    for name, results in sorted(samples.items()):
+        latencies = [latency * 1000 for latency, status, queries in results]
+        errors = sum(1 for latency, status, queries in results if status >= 400)
+
+        endpoints[name] = {
+            'requests': len(results),
+            'errors': errors,
+            'throughput': len(results) / elapsed,
+            'p50_ms': percentile(latencies, 0.50),
+            'p95_ms': percentile(latencies, 0.95),
+            'p99_ms': percentile(latencies, 0.99),
+            'queries': sum(queries for latency, status, queries in results) / len(results),
+        }
+
+    return endpoints
+
+
+def report(endpoints, baseline=None):
+    print('{:<16} {:>8} {:>7} {:>10} {:>9} {:>9} {:>9} {:>8}'.format(
+        'endpoint', 'requests', 'errors', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'queries'))
+
+    for name, stats in endpoints.items():
+        print('{:<16} {requests:>8} {errors:>7} {throughput:>10.1f} {p50_ms:>9.2f} {p95_ms:>9.2f} {p99_ms:>9.2f} '
+              '{queries:>8.1f}'.format(name, **stats))
+
+        previous = (baseline or {}).get(name)
+
+        if previous:
+            print('{:<16} {:>35} {:>+9.1%} {:>+9.1%} {:>9} {:>+8.1f}'.format(
+                '  vs baseline', '',
+                stats['p50_ms'] / previous['p50_ms'] - 1,
+                stats['p95_ms'] / previous['p95_ms'] - 1,
+                '', stats['queries'] - previous['queries']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed a database, replay a traffic mix and report latency.')
+    parser.add_argument('--database-url', help='defaults to the TestingConfig SQLite database')
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--recipes', type=int, default=5000)
+    parser.add_argument('--traffic', default=os.path.join(BENCHMARK_DIR, 'traffic.jsonl'))
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--no-reset', action='store_true',
+                        help='replay against the data seeded by an earlier run instead of reseeding')
+    parser.add_argument('--output', default=os.path.join(BENCHMARK_DIR, 'results'))
+    parser.add_argument('--baseline', help='results file to compare against')
+    args = parser.parse_args()
+
+    os.environ['ENV'] = 'Testing'
+
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+
+    from app import create_app
+    from extensions import db
+
+    app = create_app()
+    rng = random.Random(args.seed)
+
+    with app.app_context():
+        if args.no_reset:
+            dataset = load_dataset(app)
+            args.users = len(dataset.usernames)
+            args.recipes = sum(len(ids) for ids in dataset.recipes_by_user.values())
+            print('loaded {} users and {} recipes'.format(args.users, args.recipes))
+        else:
+            reset_database(app)
+
+            started = time.perf_counter()
+            dataset = seed(app, users=args.users, recipes=args.recipes, rng=rng)
+            print('seeded {} users and {} recipes in {:.1f}s'.format(args.users, args.recipes,
+                                                                      time.perf_counter() - started))
+
+        if not dataset.published_ids:
+            parser.error('the database has no published recipes to replay against')
+
+        db.session.remove()
+
+    traffic = load_traffic(args.traffic)
+    samples, elapsed = replay(app, traffic, dataset, requests=args.requests, concurrency=args.concurrency,
+                              seed_value=args.seed)
+    endpoints = summarize(samples, elapsed)
+
+    baseline = None
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['endpoints']
+
+    report(endpoints, baseline)
+    print('{} requests in {:.1f}s ({:.1f} req/s)'.format(args.requests, elapsed, args.requests / elapsed))
+
+    os.makedirs(args.output, exist_ok=True)
+    path = os.path.join(args.output, '{}.json'.format(datetime.utcnow().strftime('%Y%m%dT%H%M%S')))
+
+    with app.app_context():
+        database = db.engine.dialect.name
+
+    with open(path, 'w') as f:
+        json.dump({
+            'created_at': datetime.utcnow().isoformat(),
+            'database': database,
+            'users': args.users,
+            'recipes': args.recipes,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'seed': args.seed,
+            'traffic': os.path.basename(args.traffic),
+            'elapsed': elapsed,
+            'endpoints': endpoints,
+        }, f, indent=2)
+
+    print('results written to {}'.format(path))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+import pickle
+import time
+import uuid
+from collections import OrderedDict
+from threading import Lock
+from urllib.parse import urlencode
+
+from flask import current_app, request
+from flask_caching.backends.base import BaseCache
+
+from extensions import cache, db
+
+
+class LRUCache(BaseCache):
+
+    def __init__(self, threshold=500, default_timeout=300):
+        super().__init__(default_timeout)
+        self._cache = OrderedDict()
+        self._threshold = threshold
+        self._lock = Lock()
+
+    def _expires_at(self, timeout):
+        timeout = self._normalize_timeout(timeout)
+        if timeout > 0:
+            return time.time() + timeout
+        return 0
+
+    def get(self, key):
+        with self._lock:
+            try:
+                expires_at, value = self._cache[key]
+            except KeyError:
+                return None
+
+            if expires_at != 0 and expires_at <= time.time():
+                del self._cache[key]
+                return None
+
+            self._cache.move_to_end(key)
+
+        return pickle.loads(value)
+
+    def set(self, key, value, timeout=None):
+        entry = (self._expires_at(timeout), pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+        with self._lock:
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+
+            while len(self._cache) > self._threshold:
+                self._cache.popitem(last=False)
+
+        return True
+
+    def add(self, key, value, timeout=None):
+        if self.has(key):
+            return False
+        return self.set(key, value, timeout)
+
+    def delete(self, key):
+        with self._lock:
+            return self._cache.pop(key, None) is not None
+
+    def has(self, key):
+        return self.get(key) is not None
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+        return True
+
+
+def lru(app, config, args, kwargs):
+    kwargs.update(threshold=config.get('CACHE_THRESHOLD', 500))
+    return LRUCache(*args, **kwargs)
+
+
+def get_versions(*namespaces):
+    version_keys = ['version:{}'.format(namespace) for namespace in namespaces]
+    versions = cache.get_many(*version_keys)
+
+    for i, version in enumerate(versions):
+        if version is None:
+            versions[i] = uuid.uuid4().hex
+            cache.set(version_keys[i], versions[i], timeout=0)
+
+    return versions
+
+
+def use_primary_if_cleared(*namespaces):
+    if any(cache.get_many(*['cleared:{}'.format(namespace) for namespace in namespaces])):
+        db.use_primary(wrote=False)
+
+
+def cache_key(*namespaces):
+    versions = get_versions(*namespaces)
+
+    use_primary_if_cleared(*namespaces)
+
+    args = urlencode(sorted(request.args.items(multi=True)))
+
+    return 'view:{}:{}{}?{}'.format(':'.join(versions), request.host_url, request.path.lstrip('/'), args)
+
+
+def clear_cache(*namespaces):
+    cache.set_many({'version:{}'.format(namespace): uuid.uuid4().hex for namespace in namespaces}, timeout=0)
+
+    window = current_app.config['SQLALCHEMY_REPLICA_STICKY_SECONDS']
+
+    if window > 0:
+        cache.set_many({'cleared:{}'.format(namespace): True for namespace in namespaces}, timeout=window)
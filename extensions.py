@@ -1,7 +1,10 @@
-from flask_sqlalchemy import SQLAlchemy
+from flask_caching import Cache
 from flask_jwt_extended import JWTManager
 from flask_uploads import UploadSet, IMAGES
 
-db = SQLAlchemy()
+from routing import RoutingSQLAlchemy
+
+cache = Cache()
+db = RoutingSQLAlchemy(cache=cache)
 jwt = JWTManager()
 image_set = UploadSet('images', IMAGES)
\ No newline at end of file
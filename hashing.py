@@ -0,0 +1,91 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from threading import BoundedSemaphore, Lock
+
+from passlib.context import CryptContext
+
+
+class HashingBusy(Exception):
+    pass
+
+
+@lru_cache(maxsize=8)
+def load_context(config):
+    return CryptContext.from_string(config)
+
+
+def _hash(config, password):
+    return load_context(config).hash(password)
+
+
+def _verify_and_update(config, password, hashed):
+    return load_context(config).verify_and_update(password, hashed)
+
+
+class PasswordHasher:
+
+    def __init__(self):
+        self.config = CryptContext(schemes=['pbkdf2_sha256']).to_string()
+        self.workers = 0
+        self.retry_after = 1
+        self._slots = None
+        self._executor = None
+        self._pid = None
+        self._lock = Lock()
+
+    def init_app(self, app):
+        schemes = app.config['PASSWORD_SCHEMES']
+        options = {}
+
+        for scheme, rounds in app.config['PASSWORD_ROUNDS'].items():
+            options['{}__default_rounds'.format(scheme)] = rounds
+            options['{}__min_rounds'.format(scheme)] = rounds
+
+        self.config = CryptContext(schemes=schemes, default=schemes[0], deprecated='auto', **options).to_string()
+        self.workers = app.config['PASSWORD_HASH_WORKERS']
+        self.retry_after = app.config['PASSWORD_HASH_RETRY_AFTER']
+        self._slots = BoundedSemaphore(self.workers + app.config['PASSWORD_HASH_QUEUE_SIZE'])
+
+    def _get_executor(self, broken=None):
+        with self._lock:
+            if self._executor is not None and self._executor is broken:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                self._pid = os.getpid()
+
+            return self._executor
+
+    def _run(self, func, *args):
+        if not self.workers:
+            return func(self.config, *args)
+
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+
+        try:
+            executor = self._get_executor()
+
+            try:
+                return executor.submit(func, self.config, *args).result()
+            except BrokenProcessPool:
+                return self._get_executor(broken=executor).submit(func, self.config, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(_hash, password)
+
+    def verify(self, password, hashed):
+        valid, new_hash = self.verify_and_update(password, hashed)
+        return valid
+
+    def verify_and_update(self, password, hashed):
+        return self._run(_verify_and_update, password, hashed)
+
+
+passwords = PasswordHasher()
@@ -0,0 +1,316 @@
+import cProfile
+import hmac
+import os
+import random
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from threading import Lock, local
+
+from flask import Response, current_app, has_app_context, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from extensions import db
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:
+    prometheus_client = None
+
+try:
+    from pyinstrument import Profiler
+except ImportError:
+    Profiler = None
+
+PHASES = ('db', 'serialize', 'image')
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.statements = []
+        self._local = local()
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    @property
+    def thread_count(self):
+        return getattr(self._local, 'count', 0)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+        self._local.count = self.thread_count + 1
+
+
+@contextmanager
+def count_queries(engine=None):
+    engine = engine or db.engine
+    counter = QueryCounter()
+
+    event.listen(engine, 'before_cursor_execute', counter)
+
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', counter)
+
+
+class RequestStats:
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings = defaultdict(float)
+        self.queries = 0
+        self.profiler = None
+        self.profile = None
+        self._active = set()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def start(self, phase):
+        if phase in self._active:
+            return None
+
+        self._active.add(phase)
+
+        return time.perf_counter()
+
+    def stop(self, phase, started):
+        if started is None:
+            return
+
+        self._active.discard(phase)
+        self.timings[phase] += time.perf_counter() - started
+
+
+def request_stats():
+    if not has_request_context():
+        return None
+    return request.environ.get('smilecook.stats')
+
+
+@contextmanager
+def timed(phase):
+    stats = request_stats()
+    started = stats.start(phase) if stats is not None else None
+
+    try:
+        yield
+    finally:
+        if started is not None:
+            stats.stop(phase, started)
+
+
+class Instrumentation:
+
+    def __init__(self, app=None):
+        self.metrics = None
+        self._profile_lock = Lock()
+
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('INSTRUMENTATION', False)
+        app.config.setdefault('SERVER_TIMING', True)
+        app.config.setdefault('SLOW_QUERY_THRESHOLD', 0.5)
+        app.config.setdefault('PROFILER', 'cprofile')
+        app.config.setdefault('PROFILE_SAMPLE_RATE', 0.0)
+        app.config.setdefault('PROFILE_HEADER', 'X-Profile')
+        app.config.setdefault('PROFILE_TOKEN', None)
+        app.config.setdefault('PROFILE_DIR', 'profiles')
+
+        if not app.config['INSTRUMENTATION']:
+            return
+
+        app.extensions['instrumentation'] = self
+
+        if not event.contains(Engine, 'before_cursor_execute', before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', after_cursor_execute)
+            event.listen(Engine, 'handle_error', handle_error)
+
+        if prometheus_client is not None:
+            self.metrics = self.metrics or create_metrics()
+            app.add_url_rule('/metrics', 'metrics', self.export_metrics)
+
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+        app.teardown_request(self.teardown_request)
+
+    def before_request(self):
+        stats = RequestStats()
+        request.environ['smilecook.stats'] = stats
+
+        if self.should_profile() and self._profile_lock.acquire(blocking=False):
+            stats.profiler = start_profiler(current_app.config['PROFILER'])
+
+    def after_request(self, response):
+        stats = request_stats()
+
+        if stats is None:
+            return response
+
+        if stats.profiler is not None:
+            try:
+                stats.profile = save_profile(stats.profiler)
+            finally:
+                stats.profiler = None
+                self._profile_lock.release()
+
+        elapsed = stats.elapsed
+        endpoint = request.endpoint or 'unknown'
+
+        if self.metrics is not None:
+            self.metrics['requests'].labels(request.method, endpoint, response.status_code).observe(elapsed)
+            self.metrics['queries'].labels(endpoint).observe(stats.queries)
+
+            for phase in PHASES:
+                self.metrics['phases'].labels(endpoint, phase).observe(stats.timings.get(phase, 0.0))
+
+        if current_app.config['SERVER_TIMING']:
+            response.headers['Server-Timing'] = server_timing(stats, elapsed)
+
+        return response
+
+    def teardown_request(self, exception):
+        stats = request_stats()
+
+        if stats is not None and stats.profiler is not None:
+            stop_profiler(stats.profiler)
+            stats.profiler = None
+            self._profile_lock.release()
+
+    def should_profile(self):
+        config = current_app.config
+        token = request.headers.get(config['PROFILE_HEADER'])
+
+        if token is not None and config['PROFILE_TOKEN']:
+            return hmac.compare_digest(token, config['PROFILE_TOKEN'])
+
+        return random.random() < config['PROFILE_SAMPLE_RATE']
+
+    def export_metrics(self):
+        registry = prometheus_client.REGISTRY
+
+        if 'prometheus_multiproc_dir' in os.environ:
+            registry = prometheus_client.CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+
+        return Response(prometheus_client.generate_latest(registry), content_type=prometheus_client.CONTENT_TYPE_LATEST)
+
+
+def create_metrics():
+    return {
+        'requests': prometheus_client.Histogram(
+            'smilecook_request_duration_seconds', 'Request duration',
+            ['method', 'endpoint', 'status']),
+        'phases': prometheus_client.Histogram(
+            'smilecook_request_phase_seconds', 'Time spent per request in the database, serialization and image work',
+            ['endpoint', 'phase']),
+        'queries': prometheus_client.Histogram(
+            'smilecook_request_queries', 'SQL statements per request',
+            ['endpoint'], buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, float('inf'))),
+        'slow_queries': prometheus_client.Counter(
+            'smilecook_slow_queries', 'SQL statements slower than SLOW_QUERY_THRESHOLD'),
+    }
+
+
+def server_timing(stats, elapsed):
+    timings = ['db;dur={:.2f};desc="{} queries"'.format(stats.timings['db'] * 1000, stats.queries)]
+    timings.extend('{};dur={:.2f}'.format(phase, stats.timings[phase] * 1000) for phase in PHASES[1:]
+                   if phase in stats.timings)
+    timings.append('total;dur={:.2f}'.format(elapsed * 1000))
+
+    if stats.profile:
+        timings.append('profile;desc="{}"'.format(os.path.basename(stats.profile)))
+
+    return ', '.join(timings)
+
+
+def start_profiler(name):
+    if name == 'pyinstrument' and Profiler is not None:
+        profiler = Profiler()
+        profiler.start()
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    return profiler
+
+
+def stop_profiler(profiler):
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+    else:
+        profiler.stop()
+
+
+def save_profile(profiler):
+    directory = current_app.config['PROFILE_DIR']
+    name = '{}-{}-{}'.format(datetime.utcnow().strftime('%Y%m%dT%H%M%S%f'), request.method,
+                             (request.endpoint or 'unknown').replace('.', '_'))
+
+    os.makedirs(directory, exist_ok=True)
+    stop_profiler(profiler)
+
+    if isinstance(profiler, cProfile.Profile):
+        path = os.path.join(directory, name + '.prof')
+        profiler.dump_stats(path)
+    else:
+        path = os.path.join(directory, name + '.html')
+        with open(path, 'w') as f:
+            f.write(profiler.output_html())
+
+    current_app.logger.info('Profiled %s %s in %s', request.method, request.path, path)
+
+    return path
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('smilecook.query_started', []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['smilecook.query_started'].pop()
+    record_query(statement, elapsed)
+
+
+def handle_error(context):
+    started = context.connection.info.get('smilecook.query_started') if context.connection is not None else None
+
+    if started:
+        record_query(context.statement, time.perf_counter() - started.pop())
+
+
+def record_query(statement, elapsed):
+    if not has_app_context():
+        return
+
+    instrumentation = current_app.extensions.get('instrumentation')
+
+    if instrumentation is None:
+        return
+
+    stats = request_stats()
+
+    if stats is not None:
+        stats.queries += 1
+        stats.timings['db'] += elapsed
+
+    if elapsed >= current_app.config['SLOW_QUERY_THRESHOLD']:
+        if instrumentation.metrics is not None:
+            instrumentation.metrics['slow_queries'].inc()
+
+        current_app.logger.warning('Slow query (%.1f ms) %s: %s', elapsed * 1000,
+                                   request.endpoint if has_request_context() else 'worker', ' '.join(statement.split()))
+
+
+instrumentation = Instrumentation()
@@ -1,16 +1,37 @@
+import json
+import threading
+
 import requests
+from requests.adapters import HTTPAdapter
 
 
 class MailgunApi:
 
-    API_URL = 'https://api.mailgun.net/v3/{}/messages'
+    API_URL = 'https://api.mailgun.net/v3'
+    BATCH_SIZE = 1000
 
-    def __init__(self, domain, api_key):
+    def __init__(self, domain, api_key, api_url=None, timeout=10, pool_size=10):
         self.domain = domain
         self.key = api_key
-        self.base_url = self.API_URL.format(self.domain)
+        self.base_url = '{}/{}/messages'.format((api_url or self.API_URL).rstrip('/'), self.domain)
+        self.timeout = timeout
+        self.pool_size = pool_size
+
+        self._local = threading.local()
+
+    @property
+    def session(self):
+        session = getattr(self._local, 'session', None)
 
-    def send_email(self, to, subject, text, html=None):
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.auth = ('api', self.key)
+            session.mount('https://', HTTPAdapter(pool_maxsize=self.pool_size))
+            session.mount('http://', HTTPAdapter(pool_maxsize=self.pool_size))
+
+        return session
+
+    def send_email(self, to, subject, text, html=None, recipient_variables=None):
 
         if not isinstance(to, (list, tuple)):
             to = [to, ]
@@ -23,8 +44,11 @@ class MailgunApi:
             'html': html
         }
 
-        response = requests.post(url=self.base_url,
-                                 auth=('api', self.key),
-                                 data=data)
+        if recipient_variables is not None:
+            data['recipient-variables'] = json.dumps(recipient_variables)
+
+        response = self.session.post(url=self.base_url,
+                                     data=data,
+                                     timeout=self.timeout)
 
-        return response
\ No newline at end of file
+        return response
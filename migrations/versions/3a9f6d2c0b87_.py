@@ -0,0 +1,31 @@
+"""empty message
+
+Revision ID: 3a9f6d2c0b87
+Revises: c51d8a3f7e29
+Create Date: 2026-10-18 14:20:36.105528
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3a9f6d2c0b87'
+down_revision = 'c51d8a3f7e29'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        ALTER TABLE recipe ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(directions, '')), 'C')
+        ) STORED
+    """)
+    op.create_index('ix_recipe_search_vector', 'recipe', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('ix_recipe_search_vector', table_name='recipe')
+    op.drop_column('recipe', 'search_vector')
@@ -1,8 +1,24 @@
+from collections import defaultdict
+
+from caching import clear_cache
 from extensions import db
+from models.image_blob import release_image
+from pagination import paginate
+
+NULL_SORT_VALUES = {'asc': 2 ** 31 - 1, 'desc': -(2 ** 31 - 1)}
+
+
+def nulls_last(column, order):
+    return db.func.coalesce(column, db.literal_column(str(NULL_SORT_VALUES[order])))
 
 
 class Recipe(db.Model):
     __tablename__ = 'recipe'
+    __table_args__ = (
+        db.Index('ix_recipe_published_created_at_id', 'created_at', 'id', postgresql_where=db.text('is_publish')),
+        db.Index('ix_recipe_published_name_id', 'name', 'id', postgresql_where=db.text('is_publish')),
+        db.Index('ix_recipe_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -12,35 +28,346 @@ class Recipe(db.Model):
     directions = db.Column(db.String(1000))
     is_publish = db.Column(db.Boolean(), default=False)
     cover_image = db.Column(db.String(100), default=None)
+    cover_renditions = db.Column(db.JSON, default=None)
 
     created_at = db.Column(db.DateTime(), nullable=False, server_default=db.func.now())
     updated_at = db.Column(db.DateTime(), nullable=False, server_default=db.func.now(), onupdate=db.func.now())
 
     user_id = db.Column(db.Integer(), db.ForeignKey("user.id"))
 
+    FIELD_COLUMNS = {
+        'cover_url': ('cover_image', 'cover_renditions'),
+        'cover_urls': ('cover_image', 'cover_renditions'),
+        'author': ('user_id', ),
+    }
+
+    AUTHOR_COLUMNS = ('id', 'username', 'avatar_image', 'avatar_renditions', 'created_at', 'updated_at')
+
+    @classmethod
+    def with_author(cls, query):
+        author = db.joinedload(cls.user).load_only(*cls.AUTHOR_COLUMNS)
+
+        return query.options(author)
+
+    @classmethod
+    def select_fields(cls, query, fields=None, sort='created_at'):
+        if fields is None:
+            names = set(cls.__table__.c.keys())
+        else:
+            names = {'id', 'created_at', sort}
+
+            for field in fields:
+                names.update(cls.FIELD_COLUMNS.get(field, (field, )))
+
+        columns = [getattr(cls, name) for name in sorted(names)]
+
+        if fields is None or 'author' in fields:
+            author = cls.user.property.mapper.class_
+            columns += [getattr(author, name).label('author_' + name) for name in cls.AUTHOR_COLUMNS]
+            query = query.outerjoin(cls.user)
+
+        return query.with_entities(*columns)
+
+    @classmethod
+    def get_version(cls, query):
+        author = cls.user.property.mapper.class_
+
+        count, updated_at, author_updated_at = query.outerjoin(cls.user).with_entities(
+            db.func.count(cls.id), db.func.max(cls.updated_at), db.func.max(author.updated_at)).one()
+
+        return count, max(filter(None, (updated_at, author_updated_at)), default=None)
+
+    @property
+    def last_modified(self):
+        if self.user is not None:
+            return max(self.updated_at, self.user.updated_at)
+        return self.updated_at
+
     @classmethod
-    def get_all_published(cls):
-        return cls.query.filter_by(is_publish=True).all()
+    def apply_filters(cls, query, min_cook_time=None, max_cook_time=None, min_servings=None, max_servings=None,
+                      author=None, created_after=None, created_before=None):
+        if min_cook_time is not None:
+            query = query.filter(cls.cook_time >= min_cook_time)
+        if max_cook_time is not None:
+            query = query.filter(cls.cook_time <= max_cook_time)
+        if min_servings is not None:
+            query = query.filter(cls.num_of_servings >= min_servings)
+        if max_servings is not None:
+            query = query.filter(cls.num_of_servings <= max_servings)
+        if author is not None:
+            query = query.filter(cls.user.has(username=author))
+        if created_after is not None:
+            query = query.filter(cls.created_at >= created_after)
+        if created_before is not None:
+            query = query.filter(cls.created_at < created_before)
+
+        return query
 
     @classmethod
-    def get_all_by_user(cls, user_id, visibility='public'):
+    def get_page(cls, query, limit, cursor, sort='created_at', order='desc'):
+        column = getattr(cls, sort)
+
+        if cls.__table__.c[sort].nullable:
+            column = nulls_last(column, order).label('sort_key')
+            query = query.add_columns(column)
+
+        return paginate(query, [column, cls.id], limit=limit, cursor=cursor, descending=order == 'desc')
+
+    @classmethod
+    def query_published(cls, **filters):
+        return cls.apply_filters(cls.query.filter_by(is_publish=True), **filters)
+
+    @classmethod
+    def query_by_user(cls, user_id, visibility='public', **filters):
         if visibility == 'public':
-            return cls.query.filter_by(user_id=user_id, is_publish=True).all()
+            query = cls.query.filter_by(user_id=user_id, is_publish=True)
 
         elif visibility == 'private':
-            return cls.query.filter_by(user_id=user_id, is_publish=False).all()
+            query = cls.query.filter_by(user_id=user_id, is_publish=False)
 
         else:
-            return cls.query.filter_by(user_id=user_id).all()
+            query = cls.query.filter_by(user_id=user_id)
+
+        return cls.apply_filters(query, **filters)
+
+    @classmethod
+    def get_all_published(cls, limit=20, cursor=None, sort='created_at', order='desc', fields=None, **filters):
+        query = cls.select_fields(cls.query_published(**filters), fields=fields, sort=sort)
+
+        return cls.get_page(query, limit=limit, cursor=cursor, sort=sort, order=order)
+
+    @classmethod
+    def export_published(cls, fields=None, batch_size=1000, **filters):
+        query = cls.select_fields(cls.query_published(**filters), fields=fields)
+
+        return query.order_by(cls.id).execution_options(stream_results=True).yield_per(batch_size)
+
+    @classmethod
+    def get_published_version(cls, **filters):
+        return cls.get_version(cls.query_published(**filters))
+
+    @classmethod
+    def get_all_by_user(cls, user_id, visibility='public', limit=20, cursor=None, sort='created_at', order='desc',
+                        fields=None, **filters):
+        query = cls.select_fields(cls.query_by_user(user_id, visibility, **filters), fields=fields, sort=sort)
+
+        return cls.get_page(query, limit=limit, cursor=cursor, sort=sort, order=order)
+
+    @classmethod
+    def get_version_by_user(cls, user_id, visibility='public', **filters):
+        return cls.get_version(cls.query_by_user(user_id, visibility, **filters))
+
+    @classmethod
+    def search(cls, q, limit=20, cursor=None, fields=None):
+        query = cls.select_fields(cls.query_published(), fields=fields)
+
+        if db.engine.dialect.name == 'postgresql':
+            tsquery = db.func.plainto_tsquery('english', q)
+            vector = db.literal_column('recipe.search_vector')
+            rank = db.func.ts_rank_cd(vector, tsquery, type_=db.Float).label('rank')
+
+            query = query.filter(vector.op('@@')(tsquery)).add_columns(rank)
+
+            return paginate(query, [rank, cls.id], limit=limit, cursor=cursor)
+
+        query = query.filter(db.or_(cls.name.contains(q, autoescape=True),
+                                    cls.description.contains(q, autoescape=True),
+                                    cls.directions.contains(q, autoescape=True)))
+
+        return paginate(query, [cls.created_at, cls.id], limit=limit, cursor=cursor)
 
     @classmethod
     def get_by_id(cls, recipe_id):
-        return cls.query.filter_by(id=recipe_id).first()
+        return cls.with_author(cls.query.filter_by(id=recipe_id)).first()
+
+    @classmethod
+    def get_rows_by_ids(cls, ids, fields=None):
+        return cls.select_fields(cls.query.filter(cls.id.in_(ids)), fields=fields).order_by(cls.id).all()
+
+    @classmethod
+    def check_owner(cls, ids, user_id):
+        owners = dict(db.session.query(cls.id, cls.user_id).filter(cls.id.in_(ids)).with_for_update())
+        errors = {}
+
+        for recipe_id in ids:
+            if recipe_id not in owners:
+                errors[recipe_id] = 'Recipe not found'
+            elif owners[recipe_id] != user_id:
+                errors[recipe_id] = 'Access is not allowed'
+
+        return errors
+
+    @classmethod
+    def bulk_create(cls, user_id, items):
+        columns = ('name', 'description', 'num_of_servings', 'cook_time', 'directions')
+        rows = [dict({column: item.get(column) for column in columns}, user_id=user_id, is_publish=False)
+                for item in items]
+
+        if db.engine.dialect.name == 'postgresql':
+            ids = [recipe_id for recipe_id, in db.session.execute(cls.__table__.insert().values(rows).returning(cls.id))]
+        else:
+            recipes = [cls(**row) for row in rows]
+            db.session.add_all(recipes)
+            db.session.flush()
+            ids = [recipe.id for recipe in recipes]
+
+        db.session.commit()
+
+        return ids
+
+    @classmethod
+    def bulk_update(cls, user_id, items):
+        errors = cls.check_owner([recipe_id for recipe_id, values in items], user_id)
+
+        if errors:
+            db.session.rollback()
+            return errors
+
+        groups = defaultdict(list)
+
+        for recipe_id, values in items:
+            values = {key: value for key, value in values.items() if value}
+
+            if values:
+                groups[tuple(sorted(values))].append(dict({'new_' + key: value for key, value in values.items()},
+                                                          recipe_id=recipe_id))
+
+        for keys, params in groups.items():
+            statement = cls.__table__.update().where(cls.id == db.bindparam('recipe_id')) \
+                .where(cls.user_id == user_id).values({key: db.bindparam('new_' + key) for key in keys})
+            db.session.execute(statement, params)
+
+        db.session.commit()
+
+        cls.clear_caches([recipe_id for recipe_id, values in items], user_id=user_id)
+
+        return {}
+
+    @classmethod
+    def bulk_publish(cls, user_id, ids, is_publish=True):
+        count = cls.query.filter(cls.id.in_(ids), cls.user_id == user_id) \
+            .update({'is_publish': is_publish}, synchronize_session=False)
+
+        if count != len(ids):
+            errors = cls.check_owner(ids, user_id)
+            db.session.rollback()
+            return errors
+
+        db.session.commit()
+
+        cls.clear_caches(ids, user_id=user_id)
+
+        return {}
+
+    @classmethod
+    def execute_owned(cls, statement, recipe_id, user_id, returning=()):
+        statement = statement.where(cls.id == recipe_id).where(cls.user_id == user_id)
+
+        if db.engine.dialect.name == 'postgresql':
+            row = db.session.execute(statement.returning(cls.is_publish, *returning)).first()
+        elif returning:
+            row = db.session.query(cls.is_publish, *returning).filter(cls.id == recipe_id, cls.user_id == user_id) \
+                .with_for_update().first()
+            if row is not None and db.session.execute(statement).rowcount == 0:
+                row = None
+        else:
+            row = (True,) if db.session.execute(statement).rowcount else None
+
+        if row is None:
+            error = cls.check_owner([recipe_id], user_id)[recipe_id]
+            db.session.rollback()
+            return error, None
+
+        db.session.commit()
+
+        return None, row
+
+    @classmethod
+    def update_owned(cls, recipe_id, user_id, **values):
+        statement = cls.__table__.update().values(**values or {'updated_at': cls.updated_at})
+        error, row = cls.execute_owned(statement, recipe_id, user_id)
+
+        if error is None and (row[0] or 'is_publish' in values):
+            cls.clear_cache(recipe_id=recipe_id, user_id=user_id)
+
+        return error
+
+    @classmethod
+    def update_owned_row(cls, recipe_id, user_id, **values):
+        if db.engine.dialect.name != 'postgresql':
+            error = cls.update_owned(recipe_id=recipe_id, user_id=user_id, **values)
+
+            if error is not None:
+                return error, None
+
+            return None, cls.get_rows_by_ids([recipe_id])[0]
+
+        author = cls.user.property.mapper.class_
+        statement = cls.__table__.update().values(**values or {'updated_at': cls.updated_at}) \
+            .where(cls.user_id == author.id)
+        returning = [column for column in cls.__table__.c if column.key != 'is_publish'] + \
+            [getattr(author, name).label('author_' + name) for name in cls.AUTHOR_COLUMNS]
+        error, row = cls.execute_owned(statement, recipe_id, user_id, returning=returning)
+
+        if error is None and (row.is_publish or 'is_publish' in values):
+            cls.clear_cache(recipe_id=recipe_id, user_id=user_id)
+
+        return error, row
+
+    @classmethod
+    def delete_owned(cls, recipe_id, user_id):
+        error, row = cls.execute_owned(cls.__table__.delete(), recipe_id, user_id,
+                                       returning=(cls.cover_image, cls.cover_renditions))
+
+        if error is not None:
+            return error
+
+        published, cover_image, cover_renditions = row
+
+        if published:
+            cls.clear_cache(recipe_id=recipe_id, user_id=user_id)
+
+        if cover_image:
+            release_image(filename=cover_image, renditions=cover_renditions, folder='recipes')
+
+        return None
+
+    @staticmethod
+    def clear_cache(recipe_id, user_id):
+        clear_cache('recipes', 'recipe:{}'.format(recipe_id), 'user-recipes:{}'.format(user_id))
+
+    @staticmethod
+    def clear_caches(ids, user_id):
+        clear_cache('recipes', 'user-recipes:{}'.format(user_id), *['recipe:{}'.format(recipe_id) for recipe_id in ids])
 
     def save(self):
+        published = self.is_publish or True in (db.inspect(self).attrs.is_publish.history.deleted or ())
+        user_id = self.user_id
+
         db.session.add(self)
         db.session.commit()
 
+        if published:
+            self.clear_cache(recipe_id=db.inspect(self).identity[0], user_id=user_id)
+
     def delete(self):
+        published, recipe_id, user_id = self.is_publish, self.id, self.user_id
+        cover_image, cover_renditions = self.cover_image, self.cover_renditions
+
         db.session.delete(self)
-        db.session.commit()
\ No newline at end of file
+        db.session.commit()
+
+        if published:
+            self.clear_cache(recipe_id=recipe_id, user_id=user_id)
+
+        if cover_image:
+            release_image(filename=cover_image, renditions=cover_renditions, folder='recipes')
+
+
+def nulls_last_indexes(*names):
+    return [db.Index('ix_recipe_published_{}_{}_id'.format(name, order), nulls_last(getattr(Recipe, name), order),
+                     Recipe.id, postgresql_where=db.text('is_publish'))
+            for name in names for order in NULL_SORT_VALUES]
+
+
+nulls_last_indexes('cook_time', 'num_of_servings')
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+from extensions import db
+
+
+class OutboundEmail(db.Model):
+    __tablename__ = 'outbound_email'
+    __table_args__ = (
+        db.Index('ix_outbound_email_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(200), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    text = db.Column(db.Text(), nullable=False)
+    html = db.Column(db.Text())
+    variables = db.Column(db.JSON)
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.String(200))
+
+    next_attempt_at = db.Column(db.DateTime(), nullable=False, default=datetime.utcnow)
+    claimed_at = db.Column(db.DateTime())
+    sent_at = db.Column(db.DateTime())
+    created_at = db.Column(db.DateTime(), nullable=False, server_default=db.func.now())
+
+    @classmethod
+    def claim_due(cls, limit, lease, max_attempts):
+        now = datetime.utcnow()
+        due = db.and_(cls.status == 'pending', cls.next_attempt_at <= now)
+        expired = db.and_(cls.status == 'sending', cls.claimed_at < now - timedelta(seconds=lease))
+
+        emails = cls.query.filter(db.or_(due, expired)) \
+            .order_by(cls.id).limit(limit).with_for_update(skip_locked=True).all()
+
+        claimed = []
+
+        for email in emails:
+            if email.status == 'sending':
+                email.attempts += 1
+
+                if email.attempts >= max_attempts:
+                    email.status = 'failed'
+                    email.error = 'Lease expired while sending'
+                    continue
+
+            email.status = 'sending'
+            email.claimed_at = now
+            claimed.append(email)
+
+        db.session.commit()
+
+        return claimed
+
+    @classmethod
+    def mark_sent(cls, emails):
+        for email in emails:
+            email.status = 'sent'
+            email.sent_at = datetime.utcnow()
+
+        db.session.commit()
+
+    @classmethod
+    def mark_failed(cls, emails, error, max_attempts, backoff):
+        for email in emails:
+            email.attempts += 1
+            email.error = error[:200]
+
+            if email.attempts >= max_attempts:
+                email.status = 'failed'
+            else:
+                email.status = 'pending'
+                email.next_attempt_at = datetime.utcnow() + timedelta(seconds=backoff * 2 ** (email.attempts - 1))
+
+        db.session.commit()
+
+    def save(self):
+        db.session.add(self)
+        db.session.commit()
@@ -0,0 +1,77 @@
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from utils import remove_image, remove_renditions
+
+
+class ImageBlob(db.Model):
+    __tablename__ = 'image_blob'
+    __table_args__ = (
+        db.UniqueConstraint('folder', 'digest'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    folder = db.Column(db.String(20), nullable=False)
+    digest = db.Column(db.String(64), nullable=False)
+    renditions = db.Column(db.JSON, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+
+    created_at = db.Column(db.DateTime(), nullable=False, server_default=db.func.now())
+    updated_at = db.Column(db.DateTime(), nullable=False, server_default=db.func.now(), onupdate=db.func.now())
+
+    @classmethod
+    def get_for_update(cls, folder, digest):
+        return cls.query.filter_by(folder=folder, digest=digest).with_for_update().first()
+
+    @classmethod
+    def acquire(cls, folder, digest):
+        blob = cls.get_for_update(folder=folder, digest=digest)
+
+        if blob is not None:
+            blob.ref_count += 1
+
+        db.session.commit()
+
+        return blob
+
+    @classmethod
+    def create(cls, folder, digest, renditions):
+        blob = cls(folder=folder, digest=digest, renditions=renditions, ref_count=1)
+        db.session.add(blob)
+
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return cls.acquire(folder=folder, digest=digest)
+
+        return blob
+
+    @classmethod
+    def release(cls, folder, digest):
+        blob = cls.get_for_update(folder=folder, digest=digest)
+
+        if blob is None:
+            db.session.commit()
+            return None
+
+        blob.ref_count -= 1
+
+        if blob.ref_count <= 0:
+            db.session.delete(blob)
+
+        db.session.commit()
+
+        return blob
+
+
+def release_image(filename, renditions, folder):
+
+    digest = filename.split('_')[0]
+    blob = ImageBlob.release(folder=folder, digest=digest)
+
+    if blob is not None and blob.ref_count > 0:
+        return
+
+    remove_image(filename=filename, folder=folder)
+    remove_renditions(renditions=renditions, folder=folder)
@@ -0,0 +1,49 @@
+import uuid
+from datetime import datetime, timedelta
+
+from extensions import db
+
+
+class ImageJob(db.Model):
+    __tablename__ = 'image_job'
+
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    folder = db.Column(db.String(20), nullable=False)
+    target_id = db.Column(db.Integer, nullable=False)
+    source = db.Column(db.String(100), nullable=False)
+    digest = db.Column(db.String(64), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending', index=True)
+    filename = db.Column(db.String(100))
+    error = db.Column(db.String(200))
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    claimed_at = db.Column(db.DateTime())
+
+    created_at = db.Column(db.DateTime(), nullable=False, server_default=db.func.now())
+    updated_at = db.Column(db.DateTime(), nullable=False, server_default=db.func.now(), onupdate=db.func.now())
+
+    user_id = db.Column(db.Integer(), db.ForeignKey("user.id"))
+
+    @classmethod
+    def get_by_id(cls, job_id):
+        return cls.query.filter_by(id=job_id).first()
+
+    @classmethod
+    def claim_next(cls, lease):
+        now = datetime.utcnow()
+        expired = db.and_(cls.status == 'processing', cls.claimed_at < now - timedelta(seconds=lease))
+
+        job = cls.query.filter(db.or_(cls.status == 'pending', expired)).order_by(cls.created_at) \
+            .with_for_update(skip_locked=True).first()
+
+        if job is not None:
+            job.status = 'processing'
+            job.claimed_at = now
+            job.attempts += 1
+
+        db.session.commit()
+
+        return job
+
+    def save(self):
+        db.session.add(self)
+        db.session.commit()
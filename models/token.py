@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from extensions import db
+
+
+class RevokedToken(db.Model):
+    __tablename__ = 'revoked_token'
+
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), nullable=False, unique=True, index=True)
+    expires_at = db.Column(db.DateTime(), index=True)
+
+    created_at = db.Column(db.DateTime(), nullable=False, server_default=db.func.now(), index=True)
+
+    @classmethod
+    def is_revoked(cls, jti):
+        return db.session.query(cls.query.filter_by(jti=jti).exists()).scalar()
+
+    @classmethod
+    def get_active(cls, since=None):
+        query = cls.query.with_entities(cls.jti) \
+            .filter(db.or_(cls.expires_at.is_(None), cls.expires_at > datetime.utcnow()))
+
+        if since is not None:
+            query = query.filter(cls.created_at > since)
+
+        return [jti for jti, in query]
+
+    @staticmethod
+    def get_database_time():
+        return db.session.query(db.func.now()).scalar()
+
+    @classmethod
+    def prune(cls):
+        count = cls.query.filter(cls.expires_at <= datetime.utcnow()).delete(synchronize_session=False)
+        db.session.commit()
+        return count
+
+    def save(self):
+        db.session.add(self)
+        db.session.commit()
@@ -1,4 +1,7 @@
+from caching import clear_cache
 from extensions import db
+from models.blog import Recipe
+from user_cache import user_cache
 
 
 class User(db.Model):
@@ -10,6 +13,7 @@ class User(db.Model):
     password = db.Column(db.String(200))
     is_active = db.Column(db.Boolean(), default=False)
     avatar_image = db.Column(db.String(100), default=None)
+    avatar_renditions = db.Column(db.JSON, default=None)
 
     created_at = db.Column(db.DateTime(), nullable=False, server_default=db.func.now())
     updated_at = db.Column(db.DateTime(), nullable=False, server_default=db.func.now(), onupdate=db.func.now())
@@ -18,16 +22,46 @@ class User(db.Model):
 
     @classmethod
     def get_by_username(cls, username):
-        return cls.query.filter_by(username=username).first()
+        user = user_cache.get(cls, username=username)
+
+        if user is None:
+            user = user_cache.load(cls.query.filter_by(username=username), username=username)
+
+        return user
 
     @classmethod
     def get_by_email(cls, email):
         return cls.query.filter_by(email=email).first()
 
+    @classmethod
+    def get_by_username_or_email(cls, username, email):
+        return cls.query.filter(db.or_(cls.username == username, cls.email == email)).first()
+
     @classmethod
     def get_by_id(cls, id):
-        return cls.query.filter_by(id=id).first()
+        user = user_cache.get(cls, id=id)
+
+        if user is None:
+            user = user_cache.load(cls.query.filter_by(id=id), id=id)
+
+        return user
 
     def save(self):
+        state = db.inspect(self)
+        author_changed = state.persistent and any(state.attrs[key].history.has_changes()
+                                                  for key in ('username', 'avatar_image', 'avatar_renditions'))
+        usernames = {self.username, *state.attrs.username.history.deleted}
+
         db.session.add(self)
-        db.session.commit()
\ No newline at end of file
+        db.session.commit()
+
+        user_cache.invalidate(self.id, *usernames)
+
+        if author_changed:
+            self.clear_recipe_cache()
+
+    def clear_recipe_cache(self):
+        published = Recipe.query.with_entities(Recipe.id).filter_by(user_id=self.id, is_publish=True)
+
+        clear_cache('recipes', 'user-recipes:{}'.format(self.id),
+                    *['recipe:{}'.format(recipe_id) for recipe_id, in published])
\ No newline at end of file
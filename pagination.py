@@ -0,0 +1,126 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from flask import request, url_for
+from webargs import fields, validate
+
+from extensions import db
+
+
+pagination_args = {
+    'limit': fields.Int(missing=20, validate=validate.Range(min=1, max=100)),
+    'cursor': fields.Str(missing=None)
+}
+
+
+class Page(list):
+
+    def __init__(self, items, limit, next_cursor=None, prev_cursor=None):
+        super().__init__(items)
+        self.limit = limit
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def links(self):
+        return {
+            'next': self._link(self.next_cursor),
+            'prev': self._link(self.prev_cursor)
+        }
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+
+        args = request.args.to_dict()
+        args.update(request.view_args or {})
+        args['limit'] = self.limit
+        args['cursor'] = cursor
+
+        return url_for(request.endpoint, _external=True, **args)
+
+
+def encode_cursor(direction, values):
+    payload = json.dumps({'d': direction, 'v': [_dump_value(v) for v in values]}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        direction, values = payload['d'], payload['v']
+    except (TypeError, KeyError, UnicodeError, json.JSONDecodeError, binascii.Error):
+        raise ValueError('Invalid cursor')
+
+    if direction not in ('next', 'prev') or not isinstance(values, list):
+        raise ValueError('Invalid cursor')
+
+    return direction, values
+
+
+def paginate(query, columns, limit, cursor=None, descending=True, key=None):
+    direction, values = decode_cursor(cursor) if cursor else ('next', None)
+    backwards = direction == 'prev'
+
+    if values is not None:
+        if len(values) != len(columns):
+            raise ValueError('Invalid cursor')
+
+        position = db.tuple_(*columns)
+        bound = db.tuple_(*[db.literal(_load_value(c, v), c.type) for c, v in zip(columns, values)])
+
+        if descending != backwards:
+            query = query.filter(position < bound)
+        else:
+            query = query.filter(position > bound)
+
+    if descending != backwards:
+        query = query.order_by(*[c.desc() for c in columns])
+    else:
+        query = query.order_by(*[c.asc() for c in columns])
+
+    items = query.limit(limit + 1).all()
+    has_more = len(items) > limit
+    items = items[:limit]
+
+    if backwards:
+        items.reverse()
+
+    key = key or (lambda item: [getattr(item, c.key) for c in columns])
+    next_cursor = prev_cursor = None
+
+    if items:
+        if has_more or backwards:
+            next_cursor = encode_cursor('next', key(items[-1]))
+        if (has_more and backwards) or (values is not None and not backwards):
+            prev_cursor = encode_cursor('prev', key(items[0]))
+
+    return Page(items, limit=limit, next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+
+def _dump_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _load_value(column, value):
+    if value is None:
+        return value
+
+    if isinstance(column.type, db.DateTime):
+        try:
+            return datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise ValueError('Invalid cursor')
+
+    if isinstance(column.type, (db.Integer, db.Float)) and not isinstance(value, (int, float)):
+        raise ValueError('Invalid cursor')
+
+    if isinstance(column.type, db.String) and not isinstance(value, str):
+        raise ValueError('Invalid cursor')
+
+    return value
@@ -1,29 +1,72 @@
-import os
-
-from flask import request
+from flask import Response, current_app, request, stream_with_context, url_for
 from flask_restful import Resource
 from flask_jwt_extended import get_jwt_identity, jwt_required, jwt_optional
 from http import HTTPStatus
 
+from marshmallow import ValidationError
+from webargs import fields, validate
+from webargs.flaskparser import use_kwargs
+
+from caching import cache_key
 from models.blog import Recipe
-from schemas.blog import RecipeSchema
+from models.image_job import ImageJob
+from pagination import pagination_args
+from schemas.blog import RecipeSchema, RecipeUpdateSchema, RecipeIdsSchema, recipe_list_args, recipe_export_args, recipe_fields_args, get_recipe_schema
+from schemas.image_job import ImageJobSchema
+from serializers import dump_recipe, dump_recipes, stream_recipes
 
-from extensions import image_set
+from extensions import image_set, cache
 
-from utils import save_image
+from utils import save_upload, make_etag, conditional_headers, is_not_modified
 
 recipe_schema = RecipeSchema()
-recipe_cover_schema = RecipeSchema(only=('cover_url', ))
 recipe_list_schema = RecipeSchema(many=True)
+recipe_update_list_schema = RecipeUpdateSchema(many=True, partial=('name', ))
+recipe_ids_schema = RecipeIdsSchema()
+
+owner_error_status = {
+    'Recipe not found': HTTPStatus.NOT_FOUND,
+    'Access is not allowed': HTTPStatus.FORBIDDEN
+}
+image_job_schema = ImageJobSchema()
 
 
 class RecipeListResource(Resource):
 
-    def get(self):
+    @use_kwargs(dict(pagination_args, **recipe_list_args, **recipe_fields_args), location='query')
+    def get(self, limit, cursor, sort, order, fields, **filters):
+
+        key = cache_key('recipes')
+        cached = cache.get(key)
+
+        if cached is not None:
+            data, etag = cached
+            headers = conditional_headers(etag)
+
+            if is_not_modified(etag):
+                return {}, HTTPStatus.NOT_MODIFIED, headers
+
+            return data, HTTPStatus.OK, headers
+
+        count, last_modified = Recipe.get_published_version(**filters)
+        etag = make_etag('recipes', count, last_modified)
+        headers = conditional_headers(etag)
 
-        recipes = Recipe.get_all_published()
+        if is_not_modified(etag):
+            return {}, HTTPStatus.NOT_MODIFIED, headers
 
-        return recipe_list_schema.dump(recipes).data, HTTPStatus.OK
+        try:
+            recipes = Recipe.get_all_published(limit=limit, cursor=cursor, sort=sort, order=order, fields=fields,
+                                               **filters)
+        except ValueError:
+            return {'message': 'Invalid cursor'}, HTTPStatus.BAD_REQUEST
+
+        data = dump_recipes(recipes, fields)
+        data['links'] = recipes.links
+
+        cache.set(key, (data, etag))
+
+        return data, HTTPStatus.OK, headers
 
     @jwt_required
     def post(self):
@@ -32,87 +75,176 @@ class RecipeListResource(Resource):
 
         current_user = get_jwt_identity()
 
-        data, errors = recipe_schema.load(data=json_data)
-
-        if errors:
-            return {'message': 'Validation errors', 'errors': errors}, HTTPStatus.BAD_REQUEST
+        try:
+            data = recipe_schema.load(data=json_data)
+        except ValidationError as err:
+            return {'message': 'Validation errors', 'errors': err.messages}, HTTPStatus.BAD_REQUEST
 
         recipe = Recipe(**data)
         recipe.user_id = current_user
         recipe.save()
 
-        return recipe_schema.dump(recipe).data, HTTPStatus.CREATED
+        return recipe_schema.dump(recipe), HTTPStatus.CREATED
 
 
-class RecipeResource(Resource):
+def load_bulk_data(json_data):
+    items = json_data.get('data') if isinstance(json_data, dict) else None
 
-    @jwt_optional
-    def get(self, recipe_id):
+    if not isinstance(items, list) or not items:
+        return None, ({'message': 'Expected a non-empty data list'}, HTTPStatus.BAD_REQUEST)
 
-        recipe = Recipe.get_by_id(recipe_id=recipe_id)
+    limit = current_app.config['RECIPE_BULK_LIMIT']
 
-        if recipe is None:
-            return {'message': 'Recipe not found'}, HTTPStatus.NOT_FOUND
+    if len(items) > limit:
+        return None, ({'message': 'Too many recipes, the limit is {}'.format(limit)},
+                      HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
 
-        current_user = get_jwt_identity()
+    return items, None
 
-        if recipe.is_publish == False and recipe.user_id != current_user:
-            return {'message': 'Access is not allowed'}, HTTPStatus.FORBIDDEN
 
-        return recipe_schema.dump(recipe).data, HTTPStatus.OK
+def bulk_error_response(errors):
+    if 'Recipe not found' in errors.values():
+        status = HTTPStatus.NOT_FOUND
+    else:
+        status = HTTPStatus.FORBIDDEN
+
+    return {'message': 'Some recipes cannot be changed', 'errors': errors}, status
+
+
+class RecipeBulkResource(Resource):
 
     @jwt_required
-    def patch(self, recipe_id):
+    def post(self):
 
-        json_data = request.get_json()
+        items, error = load_bulk_data(request.get_json())
 
-        data, errors = recipe_schema.load(data=json_data, partial=('name',))
+        if error:
+            return error
 
-        if errors:
-            return {'message': 'Validation errors', 'errors': errors}, HTTPStatus.BAD_REQUEST
+        try:
+            data = recipe_list_schema.load(data=items)
+        except ValidationError as err:
+            return {'message': 'Validation errors', 'errors': err.messages}, HTTPStatus.BAD_REQUEST
 
-        recipe = Recipe.get_by_id(recipe_id=recipe_id)
+        ids = Recipe.bulk_create(user_id=get_jwt_identity(), items=data)
 
-        if recipe is None:
-            return {'message': 'Recipe not found'}, HTTPStatus.NOT_FOUND
+        return dump_recipes(Recipe.get_rows_by_ids(ids)), HTTPStatus.CREATED
 
-        current_user = get_jwt_identity()
+    @jwt_required
+    def patch(self):
 
-        if current_user != recipe.user_id:
-            return {'message': 'Access is not allowed'}, HTTPStatus.FORBIDDEN
+        items, error = load_bulk_data(request.get_json())
 
-        recipe.name = data.get('name') or recipe.name
-        recipe.description = data.get('description') or recipe.description
-        recipe.num_of_servings = data.get('num_of_servings') or recipe.num_of_servings
-        recipe.cook_time = data.get('cook_time') or recipe.cook_time
-        recipe.directions = data.get('directions') or recipe.directions
+        if error:
+            return error
 
-        recipe.save()
+        try:
+            data = recipe_update_list_schema.load(data=items)
+        except ValidationError as err:
+            return {'message': 'Validation errors', 'errors': err.messages}, HTTPStatus.BAD_REQUEST
+
+        ids = [item.pop('id') for item in data]
+
+        if len(set(ids)) != len(ids):
+            return {'message': 'Recipe ids must be unique'}, HTTPStatus.BAD_REQUEST
 
-        return recipe_schema.dump(recipe).data, HTTPStatus.OK
+        errors = Recipe.bulk_update(user_id=get_jwt_identity(), items=list(zip(ids, data)))
+
+        if errors:
+            return bulk_error_response(errors)
+
+        return dump_recipes(Recipe.get_rows_by_ids(ids)), HTTPStatus.OK
+
+
+class RecipeBulkPublishResource(Resource):
 
     @jwt_required
-    def delete(self, recipe_id):
+    def put(self):
+        return self.publish(is_publish=True)
 
-        recipe = Recipe.get_by_id(recipe_id=recipe_id)
+    @jwt_required
+    def delete(self):
+        return self.publish(is_publish=False)
 
-        if recipe is None:
-            return {'message': 'Recipe not found'}, HTTPStatus.NOT_FOUND
+    def publish(self, is_publish):
 
-        current_user = get_jwt_identity()
+        try:
+            data = recipe_ids_schema.load(data=request.get_json() or {})
+        except ValidationError as err:
+            return {'message': 'Validation errors', 'errors': err.messages}, HTTPStatus.BAD_REQUEST
 
-        if current_user != recipe.user_id:
-            return {'message': 'Access is not allowed'}, HTTPStatus.FORBIDDEN
+        limit = current_app.config['RECIPE_BULK_LIMIT']
+
+        if len(data['ids']) > limit:
+            return {'message': 'Too many recipes, the limit is {}'.format(limit)}, HTTPStatus.REQUEST_ENTITY_TOO_LARGE
 
-        recipe.delete()
+        errors = Recipe.bulk_publish(user_id=get_jwt_identity(), ids=data['ids'], is_publish=is_publish)
+
+        if errors:
+            return bulk_error_response(errors)
 
         return {}, HTTPStatus.NO_CONTENT
 
 
-class RecipePublishResource(Resource):
+class RecipeExportResource(Resource):
 
-    @jwt_required
-    def put(self, recipe_id):
+    @use_kwargs(dict(recipe_export_args, **recipe_fields_args), location='query')
+    def get(self, format, fields, **filters):
+
+        rows = Recipe.export_published(fields=fields, batch_size=current_app.config['EXPORT_BATCH_SIZE'], **filters)
+        chunks = stream_recipes(rows, fields=fields, array=format == 'json',
+                                chunk_size=current_app.config['EXPORT_CHUNK_SIZE'])
+
+        if format == 'json':
+            mimetype = 'application/json'
+        else:
+            mimetype = 'application/x-ndjson'
+
+        return Response(stream_with_context(chunks), mimetype=mimetype)
+
+
+class RecipeSearchResource(Resource):
+
+    @use_kwargs(dict(pagination_args, q=fields.Str(required=True, validate=validate.Length(min=1, max=200)),
+                     **recipe_fields_args), location='query')
+    def get(self, q, limit, cursor, fields):
+
+        key = cache_key('recipes')
+        data = cache.get(key)
+
+        if data is not None:
+            return data, HTTPStatus.OK
+
+        try:
+            recipes = Recipe.search(q=q, limit=limit, cursor=cursor, fields=fields)
+        except ValueError:
+            return {'message': 'Invalid cursor'}, HTTPStatus.BAD_REQUEST
+
+        data = dump_recipes(recipes, fields)
+        data['links'] = recipes.links
+
+        cache.set(key, data)
+
+        return data, HTTPStatus.OK
+
+
+class RecipeResource(Resource):
+
+    @jwt_optional
+    @use_kwargs(recipe_fields_args, location='query')
+    def get(self, recipe_id, fields):
+
+        key = cache_key('recipe:{}'.format(recipe_id))
+        cached = cache.get(key)
+
+        if cached is not None:
+            data, etag, last_modified = cached
+            headers = conditional_headers(etag, last_modified)
+
+            if is_not_modified(etag, last_modified):
+                return {}, HTTPStatus.NOT_MODIFIED, headers
+
+            return data, HTTPStatus.OK, headers
 
         recipe = Recipe.get_by_id(recipe_id=recipe_id)
 
@@ -121,29 +253,72 @@ class RecipePublishResource(Resource):
 
         current_user = get_jwt_identity()
 
-        if current_user != recipe.user_id:
+        if recipe.is_publish == False and recipe.user_id != current_user:
             return {'message': 'Access is not allowed'}, HTTPStatus.FORBIDDEN
 
-        recipe.is_publish = True
-        recipe.save()
+        last_modified = recipe.last_modified
+        etag = make_etag('recipe', recipe.id, last_modified)
+        headers = conditional_headers(etag, last_modified)
 
-        return {}, HTTPStatus.NO_CONTENT
+        if is_not_modified(etag, last_modified):
+            return {}, HTTPStatus.NOT_MODIFIED, headers
+
+        data = get_recipe_schema(fields).dump(recipe)
+
+        if recipe.is_publish:
+            cache.set(key, (data, etag, last_modified))
+
+        return data, HTTPStatus.OK, headers
+
+    @jwt_required
+    def patch(self, recipe_id):
+
+        json_data = request.get_json()
+
+        try:
+            data = recipe_schema.load(data=json_data, partial=('name',))
+        except ValidationError as err:
+            return {'message': 'Validation errors', 'errors': err.messages}, HTTPStatus.BAD_REQUEST
+
+        values = {key: value for key, value in data.items() if value}
+
+        error, row = Recipe.update_owned_row(recipe_id=recipe_id, user_id=get_jwt_identity(), **values)
+
+        if error is not None:
+            return {'message': error}, owner_error_status[error]
+
+        return dump_recipe(row), HTTPStatus.OK
 
     @jwt_required
     def delete(self, recipe_id):
 
-        recipe = Recipe.get_by_id(recipe_id=recipe_id)
+        error = Recipe.delete_owned(recipe_id=recipe_id, user_id=get_jwt_identity())
 
-        if recipe is None:
-            return {'message': 'Recipe not found'}, HTTPStatus.NOT_FOUND
+        if error is not None:
+            return {'message': error}, owner_error_status[error]
 
-        current_user = get_jwt_identity()
+        return {}, HTTPStatus.NO_CONTENT
 
-        if current_user != recipe.user_id:
-            return {'message': 'Access is not allowed'}, HTTPStatus.FORBIDDEN
 
-        recipe.is_publish = False
-        recipe.save()
+class RecipePublishResource(Resource):
+
+    @jwt_required
+    def put(self, recipe_id):
+
+        error = Recipe.update_owned(recipe_id=recipe_id, user_id=get_jwt_identity(), is_publish=True)
+
+        if error is not None:
+            return {'message': error}, owner_error_status[error]
+
+        return {}, HTTPStatus.NO_CONTENT
+
+    @jwt_required
+    def delete(self, recipe_id):
+
+        error = Recipe.update_owned(recipe_id=recipe_id, user_id=get_jwt_identity(), is_publish=False)
+
+        if error is not None:
+            return {'message': error}, owner_error_status[error]
 
         return {}, HTTPStatus.NO_CONTENT
 
@@ -171,14 +346,15 @@ class RecipeCoverUploadResource(Resource):
         if current_user != recipe.user_id:
             return {'message': 'Access is not allowed'}, HTTPStatus.FORBIDDEN
 
-        if recipe.cover_image:
-            cover_path = image_set.path(folder='recipes', filename=recipe.cover_image)
-            if os.path.exists(cover_path):
-                os.remove(cover_path)
+        try:
+            filename, digest = save_upload(image=file, folder='recipes')
+        except ValueError as e:
+            return {'message': str(e)}, HTTPStatus.BAD_REQUEST
 
-        filename = save_image(image=file, folder='recipes')
+        job = ImageJob(user_id=current_user, folder='recipes', target_id=recipe.id, source=filename,
+                       digest=digest)
+        job.save()
 
-        recipe.cover_image = filename
-        recipe.save()
+        location = url_for('imagejobresource', job_id=job.id, _external=True)
 
-        return recipe_cover_schema.dump(recipe).data, HTTPStatus.OK
\ No newline at end of file
+        return image_job_schema.dump(job), HTTPStatus.ACCEPTED, {'Location': location}
\ No newline at end of file
@@ -0,0 +1,24 @@
+from flask_restful import Resource
+from flask_jwt_extended import get_jwt_identity, jwt_required
+from http import HTTPStatus
+
+from models.image_job import ImageJob
+from schemas.image_job import ImageJobSchema
+
+image_job_schema = ImageJobSchema()
+
+
+class ImageJobResource(Resource):
+
+    @jwt_required
+    def get(self, job_id):
+
+        job = ImageJob.get_by_id(job_id=job_id)
+
+        if job is None:
+            return {'message': 'Job not found'}, HTTPStatus.NOT_FOUND
+
+        if job.user_id != get_jwt_identity():
+            return {'message': 'Access is not allowed'}, HTTPStatus.FORBIDDEN
+
+        return image_job_schema.dump(job), HTTPStatus.OK
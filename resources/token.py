@@ -10,10 +10,9 @@ from flask_jwt_extended import (
     get_raw_jwt
 )
 
-from utils import check_password
+from hashing import passwords, HashingBusy
 from models.user import User
-
-black_list = set()
+from revocation import revoked_tokens, token_expires_at
 
 
 class TokenResource(Resource):
@@ -27,9 +26,22 @@ class TokenResource(Resource):
 
         user = User.get_by_email(email=email)
 
-        if not user or not check_password(password, user.password):
+        if not user:
             return {'message': 'username or password is incorrect'}, HTTPStatus.UNAUTHORIZED
 
+        try:
+            valid, new_hash = passwords.verify_and_update(password, user.password)
+        except HashingBusy:
+            return {'message': 'Server is busy, please try again'}, HTTPStatus.SERVICE_UNAVAILABLE, \
+                {'Retry-After': str(passwords.retry_after)}
+
+        if not valid:
+            return {'message': 'username or password is incorrect'}, HTTPStatus.UNAUTHORIZED
+
+        if new_hash:
+            user.password = new_hash
+            user.save()
+
         if user.is_active is False:
             return {'message': 'The user account is not activated yet'}, HTTPStatus.FORBIDDEN
 
@@ -54,8 +66,8 @@ class RevokeResource(Resource):
 
     @jwt_required
     def post(self):
-        jti = get_raw_jwt()['jti']
+        raw_jwt = get_raw_jwt()
 
-        black_list.add(jti)
+        revoked_tokens.revoke(raw_jwt['jti'], expires_at=token_expires_at(raw_jwt))
 
         return {'message': 'Successfully logged out'}, HTTPStatus.OK
\ No newline at end of file
@@ -1,31 +1,32 @@
-import os
-
 from flask import request, url_for, render_template
 from flask_restful import Resource
 from flask_jwt_extended import jwt_optional, get_jwt_identity, jwt_required
 from http import HTTPStatus
 
+from marshmallow import ValidationError
+from sqlalchemy.exc import IntegrityError
 from webargs import fields
 from webargs.flaskparser import use_kwargs
 
-from extensions import image_set
-from mailgun import MailgunApi
+from caching import cache_key
+from extensions import db, image_set, cache
+from hashing import passwords, HashingBusy
 from models.blog import Recipe
+from models.email import OutboundEmail
+from models.image_job import ImageJob
 from models.user import User
+from pagination import pagination_args
 
-from schemas.user import UserSchema
-from schemas.blog import RecipeSchema
+from schemas.image_job import ImageJobSchema
+from schemas.user import UserSchema, user_fields_args, get_user_schema
+from schemas.blog import recipe_filter_args, recipe_fields_args
+from serializers import dump_recipes
 
-from utils import generate_token, verify_token, save_image
+from utils import generate_token, verify_token, hash_password, save_upload, make_etag, conditional_headers, is_not_modified
 
 
 user_schema = UserSchema()
-user_public_schema = UserSchema(exclude=('email', ))
-user_avatar_schema = UserSchema(only=('avatar_url', ))
-recipe_list_schema = RecipeSchema(many=True)
-
-mailgun = MailgunApi(domain=os.environ.get('MAILGUN_DOMAIN'),
-                     api_key=os.environ.get('MAILGUN_API_KEY'))
+image_job_schema = ImageJobSchema()
 
 
 class UserListResource(Resource):
@@ -33,19 +34,31 @@ class UserListResource(Resource):
 
         json_data = request.get_json()
 
-        data, errors = user_schema.load(data=json_data)
-
-        if errors:
-            return {'message': 'Validation errors', 'errors': errors}, HTTPStatus.BAD_REQUEST
+        try:
+            data = user_schema.load(data=json_data)
+        except ValidationError as err:
+            return {'message': 'Validation errors', 'errors': err.messages}, HTTPStatus.BAD_REQUEST
 
-        if User.get_by_username(data.get('username')):
-            return {'message': 'username already used'}, HTTPStatus.BAD_REQUEST
+        existing = User.get_by_username_or_email(username=data.get('username'), email=data.get('email'))
 
-        if User.get_by_email(data.get('email')):
+        if existing is not None:
+            if existing.username == data.get('username'):
+                return {'message': 'username already used'}, HTTPStatus.BAD_REQUEST
             return {'message': 'email already used'}, HTTPStatus.BAD_REQUEST
 
+        try:
+            data['password'] = hash_password(data['password'])
+        except HashingBusy:
+            return {'message': 'Server is busy, please try again'}, HTTPStatus.SERVICE_UNAVAILABLE, \
+                {'Retry-After': str(passwords.retry_after)}
+
         user = User(**data)
-        user.save()
+
+        try:
+            user.save()
+        except IntegrityError:
+            db.session.rollback()
+            return {'message': 'username or email already used'}, HTTPStatus.BAD_REQUEST
 
         token = generate_token(user.email, salt='activate')
 
@@ -55,20 +68,23 @@ class UserListResource(Resource):
                        token=token,
                        _external=True)
 
-        text = 'Hi, Thanks for using SmileCook! Please confirm your registration by clicking on the link: {}'.format(link)
+        text = 'Hi, Thanks for using SmileCook! Please confirm your registration by clicking on the link: %recipient.link%'
 
-        mailgun.send_email(to=user.email,
-                           subject=subject,
-                           text=text,
-                           html=render_template('email/confirmation.html', link=link))
+        email = OutboundEmail(recipient=user.email,
+                              subject=subject,
+                              text=text,
+                              html=render_template('email/confirmation.html', link='%recipient.link%'),
+                              variables={'link': link})
+        email.save()
 
-        return user_schema.dump(user).data, HTTPStatus.CREATED
+        return user_schema.dump(user), HTTPStatus.CREATED
 
 
 class UserResource(Resource):
 
     @jwt_optional
-    def get(self, username):
+    @use_kwargs(user_fields_args, location='query')
+    def get(self, username, fields):
 
         user = User.get_by_username(username=username)
 
@@ -77,28 +93,42 @@ class UserResource(Resource):
 
         current_user = get_jwt_identity()
 
+        etag = make_etag('user', user.id, user.updated_at, current_user == user.id)
+        headers = conditional_headers(etag, user.updated_at)
+
+        if is_not_modified(etag, user.updated_at):
+            return {}, HTTPStatus.NOT_MODIFIED, headers
+
         if current_user == user.id:
-            data = user_schema.dump(user).data
+            data = get_user_schema(fields).dump(user)
         else:
-            data = user_public_schema.dump(user).data
+            data = get_user_schema(fields, exclude=('email', )).dump(user)
 
-        return data, HTTPStatus.OK
+        return data, HTTPStatus.OK, headers
 
 
 class MeResource(Resource):
 
     @jwt_required
-    def get(self):
+    @use_kwargs(user_fields_args, location='query')
+    def get(self, fields):
         user = User.get_by_id(id=get_jwt_identity())
 
-        return user_schema.dump(user).data, HTTPStatus.OK
+        etag = make_etag('me', user.id, user.updated_at)
+        headers = conditional_headers(etag, user.updated_at)
+
+        if is_not_modified(etag, user.updated_at):
+            return {}, HTTPStatus.NOT_MODIFIED, headers
+
+        return get_user_schema(fields).dump(user), HTTPStatus.OK, headers
 
 
 class UserRecipeListResource(Resource):
 
     @jwt_optional
-    @use_kwargs({'visibility': fields.Str(missing='public')})
-    def get(self, username, visibility):
+    @use_kwargs(dict(pagination_args, visibility=fields.Str(missing='public'), **recipe_filter_args,
+                     **recipe_fields_args), location='query')
+    def get(self, username, visibility, limit, cursor, sort, order, fields, **filters):
 
         user = User.get_by_username(username=username)
 
@@ -112,9 +142,39 @@ class UserRecipeListResource(Resource):
         else:
             visibility = 'public'
 
-        recipes = Recipe.get_all_by_user(user_id=user.id, visibility=visibility)
+        if visibility == 'public':
+            key = cache_key('user-recipes:{}'.format(user.id))
+            cached = cache.get(key)
 
-        return recipe_list_schema.dump(recipes).data, HTTPStatus.OK
+            if cached is not None:
+                data, etag = cached
+                headers = conditional_headers(etag)
+
+                if is_not_modified(etag):
+                    return {}, HTTPStatus.NOT_MODIFIED, headers
+
+                return data, HTTPStatus.OK, headers
+
+        count, last_modified = Recipe.get_version_by_user(user_id=user.id, visibility=visibility, **filters)
+        etag = make_etag('user-recipes', user.id, visibility, count, last_modified)
+        headers = conditional_headers(etag)
+
+        if is_not_modified(etag):
+            return {}, HTTPStatus.NOT_MODIFIED, headers
+
+        try:
+            recipes = Recipe.get_all_by_user(user_id=user.id, visibility=visibility, limit=limit, cursor=cursor,
+                                             sort=sort, order=order, fields=fields, **filters)
+        except ValueError:
+            return {'message': 'Invalid cursor'}, HTTPStatus.BAD_REQUEST
+
+        data = dump_recipes(recipes, fields)
+        data['links'] = recipes.links
+
+        if visibility == 'public':
+            cache.set(key, (data, etag))
+
+        return data, HTTPStatus.OK, headers
 
 
 class UserActivateResource(Resource):
@@ -156,14 +216,15 @@ class UserAvatarUploadResource(Resource):
 
         user = User.get_by_id(id=get_jwt_identity())
 
-        if user.avatar_image:
-            avatar_path = image_set.path(folder='avatars', filename=user.avatar_image)
-            if os.path.exists(avatar_path):
-                os.remove(avatar_path)
+        try:
+            filename, digest = save_upload(image=file, folder='avatars')
+        except ValueError as e:
+            return {'message': str(e)}, HTTPStatus.BAD_REQUEST
 
-        filename = save_image(image=file, folder='avatars')
+        job = ImageJob(user_id=user.id, folder='avatars', target_id=user.id, source=filename,
+                       digest=digest)
+        job.save()
 
-        user.avatar_image = filename
-        user.save()
+        location = url_for('imagejobresource', job_id=job.id, _external=True)
 
-        return user_avatar_schema.dump(user).data, HTTPStatus.OK
\ No newline at end of file
+        return image_job_schema.dump(job), HTTPStatus.ACCEPTED, {'Location': location}
\ No newline at end of file
@@ -0,0 +1,127 @@
+import hashlib
+import math
+import time
+from datetime import datetime, timedelta
+from threading import Lock
+
+from extensions import db
+from models.token import RevokedToken
+
+
+class BloomFilter:
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationStore:
+
+    def __init__(self):
+        self.capacity = 100000
+        self.sync_interval = 5
+        self.sync_margin = timedelta(seconds=60)
+        self.rebuild_interval = 60 * 60
+        self._filter = None
+        self._confirmed = set()
+        self._watermark = None
+        self._synced_at = 0
+        self._rebuilt_at = 0
+        self._lock = Lock()
+
+    def init_app(self, app):
+        self.capacity = app.config['REVOCATION_BLOOM_CAPACITY']
+        self.sync_interval = app.config['REVOCATION_SYNC_INTERVAL']
+        self.sync_margin = timedelta(seconds=app.config['REVOCATION_SYNC_MARGIN'])
+        self.rebuild_interval = app.config['REVOCATION_REBUILD_INTERVAL']
+
+    def revoke(self, jti, expires_at=None):
+        RevokedToken(jti=jti, expires_at=expires_at).save()
+
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(jti)
+            self._confirmed.add(jti)
+
+    def is_revoked(self, jti):
+        self.sync()
+
+        if jti in self._confirmed:
+            return True
+
+        if jti not in self._filter:
+            return False
+
+        with db.primary():
+            revoked = RevokedToken.is_revoked(jti)
+
+        if revoked:
+            self._confirmed.add(jti)
+            return True
+
+        return False
+
+    def sync(self):
+        now = time.monotonic()
+
+        if self._filter is not None and now - self._synced_at < self.sync_interval:
+            return
+
+        with self._lock:
+            if self._filter is not None and now - self._synced_at < self.sync_interval:
+                return
+
+            with db.primary():
+                if self._filter is None or now - self._rebuilt_at >= self.rebuild_interval:
+                    self._rebuild()
+                    self._rebuilt_at = now
+                else:
+                    watermark = RevokedToken.get_database_time()
+
+                    for jti in RevokedToken.get_active(since=self._watermark - self.sync_margin):
+                        self._filter.add(jti)
+
+                    self._watermark = watermark
+
+            self._synced_at = now
+
+    def clear(self):
+        with self._lock:
+            self._filter = None
+            self._confirmed = set()
+            self._watermark = None
+
+    def _rebuild(self):
+        watermark = RevokedToken.get_database_time()
+        tokens = RevokedToken.get_active()
+        bloom = BloomFilter(capacity=max(self.capacity, 2 * len(tokens)))
+
+        for jti in tokens:
+            bloom.add(jti)
+
+        self._filter = bloom
+        self._confirmed = set()
+        self._watermark = watermark
+
+
+revoked_tokens = RevocationStore()
+
+
+def token_expires_at(decrypted_token):
+    exp = decrypted_token.get('exp')
+    return datetime.utcfromtimestamp(exp) if exp else None
@@ -0,0 +1,114 @@
+import random
+from contextlib import contextmanager
+
+from flask import has_request_context, request
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy import SQLAlchemy, SignallingSession
+from sqlalchemy import orm
+from sqlalchemy.sql.dml import UpdateBase
+
+
+class RoutingSession(SignallingSession):
+
+    def __init__(self, db, **options):
+        self.db = db
+        super().__init__(db, **options)
+
+    def get_bind(self, mapper=None, clause=None):
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.db.use_primary()
+        else:
+            replica = self.db.get_replica()
+
+            if replica is not None:
+                return replica
+
+        return super().get_bind(mapper, clause)
+
+    def commit(self):
+        wrote = has_request_context() and request.environ.get('smilecook.db_wrote', False)
+
+        super().commit()
+
+        if wrote:
+            self.db.stick_to_primary()
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+
+    def __init__(self, cache=None, **kwargs):
+        self.cache = cache
+        super().__init__(**kwargs)
+
+    def init_app(self, app):
+        replicas = {'replica_{}'.format(index): uri
+                    for index, uri in enumerate(app.config.get('SQLALCHEMY_REPLICA_URIS') or [])}
+
+        app.config['SQLALCHEMY_BINDS'] = dict(app.config.get('SQLALCHEMY_BINDS') or {}, **replicas)
+        app.config.setdefault('SQLALCHEMY_REPLICA_STICKY_SECONDS', 5)
+
+        super().init_app(app)
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    def get_replica(self):
+        if not has_request_context() or request.method not in ('GET', 'HEAD'):
+            return None
+
+        if request.environ.get('smilecook.db_primary'):
+            return None
+
+        environ = request.environ
+
+        if 'smilecook.db_bind' not in environ:
+            environ['smilecook.db_bind'] = self.choose_replica()
+
+        bind = environ['smilecook.db_bind']
+
+        if bind is None:
+            return None
+
+        return self.get_engine(bind=bind)
+
+    def choose_replica(self):
+        app = self.get_app()
+        replicas = [bind for bind in app.config['SQLALCHEMY_BINDS'] if bind.startswith('replica_')]
+
+        if not replicas:
+            return None
+
+        identity = get_jwt_identity()
+
+        if identity is not None and self.cache is not None and self.cache.get('primary:{}'.format(identity)):
+            return None
+
+        return random.choice(replicas)
+
+    def use_primary(self, wrote=True):
+        if has_request_context():
+            request.environ['smilecook.db_bind'] = None
+
+            if wrote:
+                request.environ['smilecook.db_wrote'] = True
+
+    @contextmanager
+    def primary(self):
+        if not has_request_context():
+            yield
+            return
+
+        environ = request.environ
+        environ['smilecook.db_primary'] = environ.get('smilecook.db_primary', 0) + 1
+
+        try:
+            yield
+        finally:
+            environ['smilecook.db_primary'] -= 1
+
+    def stick_to_primary(self):
+        identity = get_jwt_identity()
+
+        if identity is not None and self.cache is not None:
+            timeout = self.get_app().config['SQLALCHEMY_REPLICA_STICKY_SECONDS']
+            self.cache.set('primary:{}'.format(identity), True, timeout=timeout)
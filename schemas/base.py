@@ -0,0 +1,10 @@
+from marshmallow import Schema as BaseSchema
+
+from instrumentation import timed
+
+
+class Schema(BaseSchema):
+
+    def dump(self, obj, *args, **kwargs):
+        with timed('serialize'):
+            return super().dump(obj, *args, **kwargs)
@@ -1,7 +1,12 @@
-from flask import url_for
-from marshmallow import Schema, fields, post_dump, validate, validates, ValidationError
+from functools import lru_cache
 
+from flask import request
+from marshmallow import fields, post_dump, validate, validates, ValidationError
+from webargs import fields as args
+
+from schemas.base import Schema
 from schemas.user import UserSchema
+from utils import picture_url, picture_urls
 
 
 def validate_num_of_servings(n):
@@ -11,6 +16,26 @@ def validate_num_of_servings(n):
         raise ValidationError('Number of servings must not be greater than 50.')
 
 
+recipe_filter_args = {
+    'min_cook_time': args.Int(missing=None),
+    'max_cook_time': args.Int(missing=None),
+    'min_servings': args.Int(missing=None),
+    'max_servings': args.Int(missing=None),
+    'created_after': args.DateTime(missing=None),
+    'created_before': args.DateTime(missing=None),
+    'sort': args.Str(missing='created_at', validate=validate.OneOf(['created_at', 'cook_time', 'num_of_servings', 'name'])),
+    'order': args.Str(missing='desc', validate=validate.OneOf(['asc', 'desc']))
+}
+
+recipe_list_args = dict(recipe_filter_args, author=args.Str(missing=None))
+
+recipe_export_args = dict({name: arg for name, arg in recipe_list_args.items() if name not in ('sort', 'order')},
+                          format=args.Str(missing='jsonl', validate=validate.OneOf(['jsonl', 'json'])))
+
+
+DEFAULT_COVER = 'images/assets/default-recipe-cover.jpg'
+
+
 class RecipeSchema(Schema):
     class Meta:
         ordered = True
@@ -23,6 +48,7 @@ class RecipeSchema(Schema):
     directions = fields.String(validate=[validate.Length(max=1000)])
     is_publish = fields.Boolean(dump_only=True)
     cover_url = fields.Method(serialize='dump_cover_url')
+    cover_urls = fields.Method(serialize='dump_cover_urls')
 
     author = fields.Nested(UserSchema, attribute='user', dump_only=True, exclude=('email', ))
 
@@ -43,7 +69,40 @@ class RecipeSchema(Schema):
             raise ValidationError('Cook time must not be greater than 300.')
 
     def dump_cover_url(self, recipe):
-        if recipe.cover_image:
-            return url_for('static', filename='images/recipes/{}'.format(recipe.cover_image), _external=True)
-        else:
-            return url_for('static', filename='images/assets/default-recipe-cover.jpg', _external=True)
\ No newline at end of file
+        return picture_url('recipes', recipe.cover_image, recipe.cover_renditions,
+                           size=request.args.get('size', type=int), default=DEFAULT_COVER)
+
+    def dump_cover_urls(self, recipe):
+        return picture_urls('recipes', recipe.cover_image, recipe.cover_renditions, default=DEFAULT_COVER)
+
+
+class RecipeUpdateSchema(RecipeSchema):
+
+    id = fields.Integer(required=True)
+
+
+class RecipeIdsSchema(Schema):
+
+    ids = fields.List(fields.Integer(), required=True, validate=validate.Length(min=1))
+
+    @validates('ids')
+    def validate_ids(self, value):
+        if len(set(value)) != len(value):
+            raise ValidationError('Recipe ids must be unique.')
+
+
+RECIPE_FIELDS = tuple(RecipeSchema().fields)
+
+recipe_fields_args = {
+    'fields': args.DelimitedList(args.Str(validate=validate.OneOf(RECIPE_FIELDS)), missing=None)
+}
+
+
+def get_recipe_schema(fields=None, many=False):
+    only = tuple(sorted(set(fields))) if fields else None
+    return _recipe_schema(only, many)
+
+
+@lru_cache(maxsize=64)
+def _recipe_schema(only, many):
+    return RecipeSchema(only=only, many=many)
@@ -0,0 +1,22 @@
+from marshmallow import fields
+
+from schemas.base import Schema
+from utils import image_url
+
+
+class ImageJobSchema(Schema):
+    class Meta:
+        ordered = True
+
+    id = fields.String(dump_only=True)
+    status = fields.String(dump_only=True)
+    error = fields.String(dump_only=True)
+    url = fields.Method(serialize='dump_url')
+
+    created_at = fields.DateTime(dump_only=True)
+    updated_at = fields.DateTime(dump_only=True)
+
+    def dump_url(self, job):
+        if job.status == 'done':
+            return image_url(job.folder, job.filename)
+        return None
@@ -1,7 +1,14 @@
-from flask import url_for
-from marshmallow import Schema, fields
+from functools import lru_cache
 
-from utils import hash_password
+from flask import request
+from marshmallow import fields, validate
+from webargs import fields as args
+
+from schemas.base import Schema
+from utils import picture_url, picture_urls
+
+
+DEFAULT_AVATAR = 'images/assets/default-avatar.jpg'
 
 
 class UserSchema(Schema):
@@ -11,17 +18,33 @@ class UserSchema(Schema):
     id = fields.Int(dump_only=True)
     username = fields.String(required=True)
     email = fields.Email(required=True)
-    password = fields.Method(required=True, deserialize='load_password')
+    password = fields.String(required=True, load_only=True)
     avatar_url = fields.Method(serialize='dump_avatar_url')
+    avatar_urls = fields.Method(serialize='dump_avatar_urls')
 
     created_at = fields.DateTime(dump_only=True)
     updated_at = fields.DateTime(dump_only=True)
 
-    def load_password(self, value):
-        return hash_password(value)
-
     def dump_avatar_url(self, user):
-        if user.avatar_image:
-            return url_for('static', filename='images/avatars/{}'.format(user.avatar_image), _external=True)
-        else:
-            return url_for('static', filename='images/assets/default-avatar.jpg', _external=True)
+        return picture_url('avatars', user.avatar_image, user.avatar_renditions,
+                           size=request.args.get('size', type=int), default=DEFAULT_AVATAR)
+
+    def dump_avatar_urls(self, user):
+        return picture_urls('avatars', user.avatar_image, user.avatar_renditions, default=DEFAULT_AVATAR)
+
+
+USER_FIELDS = tuple(name for name, field in UserSchema().fields.items() if not field.load_only)
+
+user_fields_args = {
+    'fields': args.DelimitedList(args.Str(validate=validate.OneOf(USER_FIELDS)), missing=None)
+}
+
+
+def get_user_schema(fields=None, exclude=()):
+    only = tuple(sorted(set(fields))) if fields else None
+    return _user_schema(only, exclude)
+
+
+@lru_cache(maxsize=64)
+def _user_schema(only, exclude):
+    return UserSchema(only=only, exclude=exclude)
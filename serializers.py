@@ -0,0 +1,139 @@
+import json
+from functools import lru_cache
+from operator import attrgetter
+
+from flask import current_app, make_response, request
+from flask_restful.representations.json import output_json as restful_output_json
+from marshmallow import fields as schema_fields
+from marshmallow.utils import isoformat
+
+from instrumentation import timed
+from schemas.blog import DEFAULT_COVER, get_recipe_schema
+from schemas.user import DEFAULT_AVATAR
+from utils import picture_url, picture_urls
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def output_json(data, code, headers=None):
+    if orjson is None or not current_app.config['ORJSON_OUTPUT'] or current_app.debug or \
+            current_app.config.get('RESTFUL_JSON'):
+        with timed('serialize'):
+            return restful_output_json(data, code, headers)
+
+    with timed('serialize'):
+        body = orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS)
+
+    response = make_response(body, code)
+    response.headers.extend(headers or {})
+
+    return response
+
+
+def dumps(data):
+    if orjson is None:
+        return json.dumps(data, separators=(',', ':')).encode()
+    return orjson.dumps(data)
+
+
+def dump_recipes(rows, fields=None):
+    serialize = compile_recipe_serializer(tuple(sorted(set(fields))) if fields else None)
+    size = request.args.get('size', type=int)
+
+    with timed('serialize'):
+        return {'data': [serialize(row, size) for row in rows]}
+
+
+def dump_recipe(row, fields=None):
+    serialize = compile_recipe_serializer(tuple(sorted(set(fields))) if fields else None)
+
+    with timed('serialize'):
+        return serialize(row, request.args.get('size', type=int))
+
+
+def stream_recipes(rows, fields=None, array=False, chunk_size=64 * 1024):
+    serialize = compile_recipe_serializer(tuple(sorted(set(fields))) if fields else None)
+    size = request.args.get('size', type=int)
+
+    separator = b',' if array else b'\n'
+    chunk = [b'['] if array else []
+    length = 0
+
+    for index, row in enumerate(rows):
+        item = dumps(serialize(row, size))
+
+        if array and index:
+            chunk.append(separator)
+
+        chunk.append(item)
+        length += len(item)
+
+        if not array:
+            chunk.append(separator)
+
+        if length >= chunk_size:
+            yield b''.join(chunk)
+            chunk, length = [], 0
+
+    if array:
+        chunk.append(b']\n')
+
+    if chunk:
+        yield b''.join(chunk)
+
+
+@lru_cache(maxsize=64)
+def compile_recipe_serializer(fields):
+    schema = get_recipe_schema(fields)
+    getters = [(name, _recipe_getter(name, field)) for name, field in schema.fields.items() if not field.load_only]
+
+    def serialize(row, size):
+        return {name: getter(row, size) for name, getter in getters}
+
+    return serialize
+
+
+def _recipe_getter(name, field):
+    if name == 'cover_url':
+        return lambda row, size: picture_url('recipes', row.cover_image, row.cover_renditions, size=size,
+                                             default=DEFAULT_COVER)
+
+    if name == 'cover_urls':
+        return lambda row, size: picture_urls('recipes', row.cover_image, row.cover_renditions, default=DEFAULT_COVER)
+
+    if name == 'author':
+        getters = [(name, _author_getter(name, field)) for name, field in field.schema.fields.items()
+                   if not field.load_only]
+
+        return lambda row, size: None if row.author_id is None else {name: getter(row, size)
+                                                                     for name, getter in getters}
+
+    return _column_getter(name, field)
+
+
+def _author_getter(name, field):
+    if name == 'avatar_url':
+        return lambda row, size: picture_url('avatars', row.author_avatar_image, row.author_avatar_renditions,
+                                             size=size, default=DEFAULT_AVATAR)
+
+    if name == 'avatar_urls':
+        return lambda row, size: picture_urls('avatars', row.author_avatar_image, row.author_avatar_renditions,
+                                              default=DEFAULT_AVATAR)
+
+    return _column_getter('author_' + name, field)
+
+
+def _column_getter(attribute, field):
+    getter = attrgetter(attribute)
+
+    if isinstance(field, schema_fields.DateTime):
+        def get_datetime(row, size):
+            value = getter(row)
+            return None if value is None else isoformat(value)
+
+        return get_datetime
+
+    return lambda row, size: getter(row)
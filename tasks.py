@@ -0,0 +1,152 @@
+import time
+
+import requests
+from flask import current_app
+from PIL import Image
+
+from extensions import db
+from mailgun import MailgunApi
+from models.blog import Recipe
+from models.email import OutboundEmail
+from models.image_blob import ImageBlob, release_image
+from models.image_job import ImageJob
+from models.token import RevokedToken
+from models.user import User
+from utils import compress_image, remove_image, select_rendition
+
+IMAGE_TARGETS = {
+    'avatars': (User, 'avatar_image', 'avatar_renditions'),
+    'recipes': (Recipe, 'cover_image', 'cover_renditions'),
+}
+
+
+def process_image_job(job):
+
+    model, attribute, renditions_attribute = IMAGE_TARGETS[job.folder]
+
+    target = model.query.get(job.target_id)
+
+    if target is None:
+        remove_image(filename=job.source, folder=job.folder)
+        fail_image_job(job, error='Target no longer exists')
+        return
+
+    blob = ImageBlob.acquire(folder=job.folder, digest=job.digest)
+
+    if blob is None:
+        try:
+            renditions = compress_image(filename=job.source, folder=job.folder, name=job.digest)
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            remove_image(filename=job.source, folder=job.folder)
+            fail_image_job(job, error=str(e))
+            return
+
+        blob = ImageBlob.create(folder=job.folder, digest=job.digest, renditions=renditions)
+    else:
+        remove_image(filename=job.source, folder=job.folder)
+
+    filename = select_rendition(blob.renditions, size=max(int(size) for size in blob.renditions))
+
+    renditions = blob.renditions
+    old_filename = getattr(target, attribute)
+    old_renditions = getattr(target, renditions_attribute)
+
+    try:
+        setattr(target, attribute, filename)
+        setattr(target, renditions_attribute, renditions)
+        target.save()
+    except Exception:
+        db.session.rollback()
+        release_image(filename=filename, renditions=renditions, folder=job.folder)
+        raise
+
+    if old_filename:
+        release_image(filename=old_filename, renditions=old_renditions, folder=job.folder)
+
+    job.status = 'done'
+    job.filename = filename
+    job.save()
+
+
+def run_image_job(job, max_attempts):
+
+    try:
+        if job.attempts > max_attempts:
+            remove_image(filename=job.source, folder=job.folder)
+            fail_image_job(job, error='Too many attempts')
+        else:
+            process_image_job(job)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.exception('Image job %s failed', job.id)
+        fail_image_job(job, error=str(e) or type(e).__name__)
+        remove_image(filename=job.source, folder=job.folder)
+
+
+def fail_image_job(job, error):
+
+    job.status = 'failed'
+    job.error = error[:200]
+    job.save()
+
+
+def send_pending_emails(mailgun):
+
+    config = current_app.config
+    emails = OutboundEmail.claim_due(limit=config['MAILGUN_BATCH_SIZE'], lease=config['EMAIL_SEND_LEASE'],
+                                     max_attempts=config['EMAIL_MAX_ATTEMPTS'])
+
+    batches = {}
+
+    for email in emails:
+        batches.setdefault((email.subject, email.text, email.html), []).append(email)
+
+    for (subject, text, html), batch in batches.items():
+        try:
+            response = mailgun.send_email(to=[email.recipient for email in batch],
+                                          subject=subject,
+                                          text=text,
+                                          html=html,
+                                          recipient_variables={email.recipient: email.variables or {} for email in batch})
+            response.raise_for_status()
+        except requests.RequestException as e:
+            OutboundEmail.mark_failed(batch, error=str(e),
+                                      max_attempts=config['EMAIL_MAX_ATTEMPTS'],
+                                      backoff=config['EMAIL_RETRY_BACKOFF'])
+        else:
+            OutboundEmail.mark_sent(batch)
+
+    return len(emails)
+
+
+def run_worker(poll_interval=1.0):
+
+    config = current_app.config
+    mailgun = MailgunApi(domain=config['MAILGUN_DOMAIN'],
+                         api_key=config['MAILGUN_API_KEY'],
+                         api_url=config['MAILGUN_API_URL'],
+                         timeout=config['MAILGUN_TIMEOUT'])
+
+    pruned_at = 0
+
+    while True:
+        try:
+            if time.monotonic() - pruned_at >= config['REVOCATION_PRUNE_INTERVAL']:
+                pruned_at = time.monotonic()
+                RevokedToken.prune()
+
+            job = ImageJob.claim_next(lease=config['IMAGE_JOB_LEASE'])
+
+            if job is not None:
+                run_image_job(job, max_attempts=config['IMAGE_JOB_MAX_ATTEMPTS'])
+
+            sent = send_pending_emails(mailgun)
+        except Exception:
+            current_app.logger.exception('Worker iteration failed')
+            db.session.rollback()
+            job, sent = None, 0
+        finally:
+            db.session.remove()
+
+        if job is None and not sent:
+            time.sleep(poll_interval)
@@ -0,0 +1,72 @@
+import os
+import sys
+
+import pytest
+from flask_jwt_extended import create_access_token
+from flask_uploads import configure_uploads
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ['ENV'] = 'Testing'
+
+from app import create_app
+from extensions import cache, db, image_set
+from models.blog import Recipe
+from models.user import User
+from revocation import revoked_tokens
+from user_cache import user_cache
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app()
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///{}'.format(tmp_path / 'test.sqlite')
+    app.config['UPLOADED_IMAGES_DEST'] = str(tmp_path / 'images')
+    configure_uploads(app, image_set)
+
+    with app.app_context():
+        db.create_all()
+
+        yield app
+
+        db.session.remove()
+        db.drop_all()
+        cache.clear()
+        user_cache.clear()
+        revoked_tokens.clear()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app):
+    def make_user(username, **kwargs):
+        user = User(username=username, email='{}@example.com'.format(username), password='x', is_active=True,
+                    **kwargs)
+        user.save()
+        return user
+
+    return make_user
+
+
+@pytest.fixture
+def make_recipe(app):
+    def make_recipe(name, user, is_publish=True, **kwargs):
+        recipe = Recipe(name=name, description='Description of {}'.format(name), num_of_servings=2,
+                        directions='Directions', is_publish=is_publish, user_id=user.id, **kwargs)
+        recipe.save()
+        return recipe
+
+    return make_recipe
+
+
+@pytest.fixture
+def auth_headers(app):
+    def auth_headers(user):
+        with app.test_request_context():
+            return {'Authorization': 'Bearer {}'.format(create_access_token(identity=user.id))}
+
+    return auth_headers
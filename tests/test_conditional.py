@@ -0,0 +1,30 @@
+import pytest
+
+
+@pytest.mark.parametrize('path', ['/recipes', '/users/author/recipes'])
+def test_conditional_list_get_after_delete_returns_the_new_list(client, make_user, make_recipe, auth_headers, path):
+    author = make_user('author')
+    soup = make_recipe('Soup', author)
+    cake = make_recipe('Cake', author)
+
+    first = client.get(path)
+
+    assert 'Last-Modified' not in first.headers
+    assert client.get(path, headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    assert client.delete('/recipes/{}'.format(cake.id), headers=auth_headers(author)).status_code == 204
+
+    for headers in ({'If-None-Match': first.headers['ETag']},
+                    {'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'}):
+        response = client.get(path, headers=headers)
+
+        assert response.status_code == 200
+        assert [recipe['id'] for recipe in response.get_json()['data']] == [soup.id]
+
+
+def test_conditional_detail_get_honours_if_modified_since(client, make_user, make_recipe):
+    recipe = make_recipe('Soup', make_user('author'))
+    response = client.get('/recipes/{}'.format(recipe.id))
+
+    assert client.get('/recipes/{}'.format(recipe.id),
+                      headers={'If-Modified-Since': response.headers['Last-Modified']}).status_code == 304
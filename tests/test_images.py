@@ -0,0 +1,62 @@
+import io
+import os
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+import utils
+from extensions import db, image_set
+from models.image_blob import ImageBlob
+from utils import save_upload
+
+
+def make_blob(digest, ref_count):
+    renditions = {'64': {'jpeg': '{}_64.jpg'.format(digest), 'webp': '{}_64.webp'.format(digest)}}
+
+    for filename in renditions['64'].values():
+        path = image_set.path(filename=filename, folder='recipes')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, 'wb').close()
+
+    db.session.add(ImageBlob(folder='recipes', digest=digest, renditions=renditions, ref_count=ref_count))
+    db.session.commit()
+
+    return renditions
+
+
+def test_deleting_recipes_releases_their_cover(client, make_user, make_recipe, auth_headers):
+    renditions = make_blob('abc', ref_count=2)
+    user = make_user('owner')
+    first = make_recipe('Soup', user, cover_image='abc_64.jpg', cover_renditions=renditions)
+    second = make_recipe('Cake', user, is_publish=False, cover_image='abc_64.jpg', cover_renditions=renditions)
+
+    assert client.delete('/recipes/{}'.format(first.id), headers=auth_headers(user)).status_code == 204
+    assert ImageBlob.query.filter_by(digest='abc').one().ref_count == 1
+    assert os.path.exists(image_set.path(filename='abc_64.jpg', folder='recipes'))
+
+    assert client.delete('/recipes/{}'.format(second.id), headers=auth_headers(user)).status_code == 204
+    assert ImageBlob.query.filter_by(digest='abc').first() is None
+    assert not os.path.exists(image_set.path(filename='abc_64.jpg', folder='recipes'))
+    assert not os.path.exists(image_set.path(filename='abc_64.webp', folder='recipes'))
+
+
+def test_recipe_delete_releases_its_cover(make_user, make_recipe):
+    renditions = make_blob('def', ref_count=1)
+    recipe = make_recipe('Soup', make_user('owner'), cover_image='def_64.jpg', cover_renditions=renditions)
+
+    recipe.delete()
+
+    assert ImageBlob.query.filter_by(digest='def').first() is None
+
+
+def test_save_upload_removes_the_temporary_file_on_any_error(app, monkeypatch):
+    def explode(file_path):
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr(utils, 'validate_image', explode)
+    image = FileStorage(stream=io.BytesIO(b'data'), filename='cover.jpg')
+
+    with app.test_request_context(), pytest.raises(RuntimeError):
+        save_upload(image=image, folder='recipes')
+
+    assert os.listdir(image_set.path(filename='', folder='recipes')) == []
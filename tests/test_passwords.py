@@ -0,0 +1,30 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+from passlib.context import CryptContext
+
+from hashing import passwords
+
+
+def test_configured_password_schemes_have_backends(app):
+    context = CryptContext.from_string(passwords.config)
+
+    for scheme in context.schemes():
+        handler = context.handler(scheme)
+        assert getattr(handler, 'has_backend', lambda: True)(), scheme
+
+
+def test_password_round_trip(app):
+    hashed = passwords.hash('correct horse')
+
+    assert passwords.verify('correct horse', hashed)
+    assert not passwords.verify('wrong horse', hashed)
+
+
+def test_hashing_recovers_from_a_broken_pool(app):
+    assert passwords.workers
+
+    crashed = passwords._get_executor().submit(os._exit, 1)
+
+    assert isinstance(crashed.exception(), BrokenProcessPool)
+    assert passwords.verify('correct horse', passwords.hash('correct horse'))
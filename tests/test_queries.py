@@ -0,0 +1,35 @@
+from extensions import cache
+from instrumentation import count_queries
+
+
+def get_query_count(client, path):
+    cache.clear()
+
+    with count_queries() as counter:
+        response = client.get(path)
+
+    assert response.status_code == 200
+
+    return counter.count
+
+
+def test_recipe_list_query_count_does_not_grow_with_page_size(client, make_user, make_recipe):
+    author = make_user('author0')
+    make_recipe('Soup', author)
+    make_recipe('Cake', author)
+
+    baseline = get_query_count(client, '/recipes')
+
+    for i in range(1, 10):
+        make_recipe('Recipe {}'.format(i), make_user('author{}'.format(i)), cover_image='cover{}.jpg'.format(i))
+
+    assert get_query_count(client, '/recipes') == baseline
+    assert get_query_count(client, '/recipes?fields=name,author') == baseline
+
+
+def test_recipe_detail_query_count_is_constant(client, make_user, make_recipe):
+    first = make_recipe('Soup', make_user('first'))
+    second = make_recipe('Cake', make_user('second', avatar_image='avatar.jpg'), cover_image='cake.jpg')
+
+    assert get_query_count(client, '/recipes/{}'.format(first.id)) == \
+        get_query_count(client, '/recipes/{}'.format(second.id))
@@ -0,0 +1,91 @@
+from models.blog import Recipe
+
+
+def get_names(client, path):
+    names = []
+
+    while path:
+        response = client.get(path)
+        assert response.status_code == 200
+        names.extend(recipe['name'] for recipe in response.get_json()['data'])
+        path = response.get_json()['links']['next']
+
+    return names
+
+
+def test_sorting_by_a_nullable_column_keeps_null_values_last(client, make_user, make_recipe):
+    author = make_user('author')
+
+    for name, cook_time in (('Soup', 30), ('Toast', None), ('Cake', 60), ('Salad', None), ('Stew', 90)):
+        make_recipe(name, author, cook_time=cook_time)
+
+    assert get_names(client, '/recipes?sort=cook_time&order=asc&limit=2') == \
+        ['Soup', 'Cake', 'Stew', 'Toast', 'Salad']
+    assert get_names(client, '/recipes?sort=cook_time&order=desc&limit=2') == \
+        ['Stew', 'Cake', 'Soup', 'Salad', 'Toast']
+
+
+def test_prev_cursor_walks_back_over_null_values(client, make_user, make_recipe):
+    author = make_user('author')
+
+    for name, cook_time in (('Soup', 30), ('Toast', None), ('Cake', 60), ('Salad', None)):
+        make_recipe(name, author, cook_time=cook_time)
+
+    first = client.get('/recipes?sort=cook_time&order=asc&limit=2').get_json()
+    second = client.get(first['links']['next']).get_json()
+    previous = client.get(second['links']['prev']).get_json()
+
+    assert [recipe['name'] for recipe in second['data']] == ['Toast', 'Salad']
+    assert previous['data'] == first['data']
+
+
+def test_version_counts_the_rows_the_page_returns(client, make_user, make_recipe):
+    author = make_user('author')
+    make_recipe('Soup', author, cook_time=30)
+    make_recipe('Toast', author)
+    Recipe(name='Orphan', num_of_servings=1, directions='Directions', is_publish=True).save()
+
+    response = client.get('/recipes?sort=cook_time')
+
+    assert len(response.get_json()['data']) == Recipe.get_published_version()[0] == 3
+
+
+def test_create_recipe_loads_and_dumps_the_recipe(client, make_user, auth_headers):
+    author = make_user('author')
+
+    response = client.post('/recipes', json={'name': 'Soup', 'num_of_servings': 2, 'cook_time': 30},
+                           headers=auth_headers(author))
+
+    assert response.status_code == 201
+    assert response.get_json()['name'] == 'Soup'
+    assert response.get_json()['author']['username'] == 'author'
+
+
+def test_create_recipe_reports_validation_errors(client, make_user, auth_headers):
+    response = client.post('/recipes', json={'cook_time': 500}, headers=auth_headers(make_user('author')))
+
+    assert response.status_code == 400
+    assert set(response.get_json()['errors']) == {'name', 'cook_time'}
+
+
+def test_patch_recipe_returns_the_updated_row(client, make_user, make_recipe, auth_headers):
+    author = make_user('author')
+    recipe = make_recipe('Soup', author)
+
+    response = client.patch('/recipes/{}'.format(recipe.id), json={'name': 'Stew', 'cook_time': 45},
+                            headers=auth_headers(author))
+
+    assert response.status_code == 200
+    assert response.get_json()['name'] == 'Stew'
+    assert response.get_json()['cook_time'] == 45
+    assert response.get_json()['author']['username'] == 'author'
+
+
+def test_patch_recipe_of_another_user_is_forbidden(client, make_user, make_recipe, auth_headers):
+    recipe = make_recipe('Soup', make_user('author'))
+
+    response = client.patch('/recipes/{}'.format(recipe.id), json={'name': 'Stew'},
+                            headers=auth_headers(make_user('other')))
+
+    assert response.status_code == 403
+    assert client.patch('/recipes/0', json={'name': 'Stew'}, headers=auth_headers(make_user('third'))).status_code == 404
@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from extensions import db
+from models.token import RevokedToken
+from revocation import revoked_tokens
+
+
+@pytest.fixture
+def store(app):
+    revoked_tokens.sync_interval = 0
+    yield revoked_tokens
+    revoked_tokens.init_app(app)
+
+
+def test_tokens_committed_out_of_order_are_picked_up(store):
+    started = RevokedToken.get_database_time()
+
+    db.session.add(RevokedToken(id=10, jti='early'))
+    db.session.commit()
+
+    assert store.is_revoked('early')
+
+    db.session.add(RevokedToken(id=5, jti='late', created_at=started - timedelta(seconds=30)))
+    db.session.commit()
+
+    assert store.is_revoked('late')
+    assert not store.is_revoked('other')
+
+
+def test_sync_does_not_prune(store):
+    db.session.add(RevokedToken(jti='expired', expires_at=datetime.utcnow() - timedelta(minutes=1)))
+    db.session.commit()
+
+    store.rebuild_interval = 0
+    store.sync()
+
+    assert RevokedToken.query.filter_by(jti='expired').count() == 1
+    assert RevokedToken.prune() == 1
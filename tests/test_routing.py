@@ -0,0 +1,41 @@
+import pytest
+
+from extensions import cache, db
+
+
+@pytest.fixture
+def replica(app, tmp_path):
+    app.config['SQLALCHEMY_BINDS'] = {'replica_0': 'sqlite:///{}'.format(tmp_path / 'replica.sqlite')}
+    engine = db.get_engine(bind='replica_0')
+    db.Model.metadata.create_all(engine)
+
+    return engine
+
+
+def test_cache_misses_read_a_replica(client, replica, make_user, make_recipe):
+    recipe = make_recipe('Soup', make_user('author'))
+    cache.clear()
+
+    assert client.get('/recipes').get_json()['data'] == []
+    assert client.get('/recipes/{}'.format(recipe.id)).status_code == 404
+    assert client.get('/users/author').status_code == 404
+
+
+def test_recently_cleared_views_are_filled_from_the_primary(client, replica, make_user, make_recipe):
+    recipe = make_recipe('Soup', make_user('author'))
+
+    assert [item['id'] for item in client.get('/recipes').get_json()['data']] == [recipe.id]
+    assert client.get('/recipes/{}'.format(recipe.id)).status_code == 200
+    assert client.get('/users/author/recipes').get_json()['data'][0]['id'] == recipe.id
+
+
+def test_recently_cleared_users_are_filled_from_the_primary(client, replica, make_user):
+    make_user('author')
+
+    assert client.get('/users/author').status_code == 200
+
+
+def test_uncached_reads_use_a_replica(client, replica, make_user, make_recipe):
+    make_recipe('Soup', make_user('author'))
+
+    assert client.get('/recipes/export').get_data() == b''
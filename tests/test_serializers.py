@@ -0,0 +1,65 @@
+import json
+
+import pytest
+from flask import current_app
+
+from models.blog import Recipe
+from schemas.blog import RECIPE_FIELDS, get_recipe_schema
+from serializers import dump_recipes
+
+FIELD_SETS = [
+    None,
+    ('id', 'name'),
+    ('name', 'author', 'cover_url'),
+    ('cover_urls', 'created_at', 'updated_at', 'is_publish'),
+    RECIPE_FIELDS,
+]
+
+
+def make_renditions(name):
+    return {str(size): {'jpeg': '{}_{}.jpg'.format(name, size), 'webp': '{}_{}.webp'.format(name, size)}
+            for size in current_app.config['IMAGE_RENDITION_SIZES']}
+
+
+@pytest.fixture
+def recipes(make_user, make_recipe):
+    plain = make_user('plain')
+    legacy = make_user('legacy', avatar_image='avatar.jpg')
+    rendered = make_user('rendered', avatar_image='avatar.jpg', avatar_renditions=make_renditions('avatar'))
+
+    make_recipe('Soup', plain, cook_time=None)
+    make_recipe('Cake', legacy, cover_image='cake.jpg')
+    make_recipe('Stew', rendered, cook_time=90, cover_image='stew.jpg', cover_renditions=make_renditions('stew'))
+    Recipe(name='Orphan', num_of_servings=1, directions='Directions', is_publish=True).save()
+
+
+@pytest.mark.usefixtures('recipes')
+@pytest.mark.parametrize('fields', FIELD_SETS)
+@pytest.mark.parametrize('path', ['/recipes', '/recipes?size=64', '/recipes?size=200', '/recipes?size=800'])
+def test_row_serializer_matches_recipe_schema(app, fields, path):
+    objects = Recipe.with_author(Recipe.query_published()).order_by(Recipe.id).all()
+    rows = Recipe.select_fields(Recipe.query_published(), fields=fields).order_by(Recipe.id).all()
+
+    with app.test_request_context(path):
+        expected = get_recipe_schema(fields, many=True).dump(objects)
+        actual = dump_recipes(rows, fields)
+
+    assert expected == actual
+    assert [list(item) for item in expected['data']] == [list(item) for item in actual['data']]
+
+
+@pytest.mark.usefixtures('recipes')
+def test_responses_keep_the_restful_json_encoding_by_default(client):
+    response = client.get('/recipes')
+
+    assert response.get_data(as_text=True) == json.dumps(response.get_json()) + '\n'
+
+
+@pytest.mark.usefixtures('recipes')
+def test_orjson_output_is_opt_in(app, client):
+    app.config['ORJSON_OUTPUT'] = True
+
+    response = client.get('/recipes')
+
+    assert response.get_data(as_text=True) == json.dumps(response.get_json(), separators=(',', ':'),
+                                                         ensure_ascii=False) + '\n'
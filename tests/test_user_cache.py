@@ -0,0 +1,57 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from extensions import db
+from models.user import User
+from user_cache import user_cache
+
+
+@contextmanager
+def invalidate_after_query(user):
+    def after_cursor_execute(*args):
+        user_cache.invalidate(user.id, user.username)
+
+    event.listen(db.engine, 'after_cursor_execute', after_cursor_execute)
+
+    try:
+        yield
+    finally:
+        event.remove(db.engine, 'after_cursor_execute', after_cursor_execute)
+
+
+def test_lookups_cache_the_user(make_user):
+    user = make_user('author')
+
+    assert User.get_by_id(user.id).username == 'author'
+    assert user_cache.get(User, id=user.id) is not None
+    assert user_cache.get(User, username='author') is not None
+
+
+def test_user_invalidated_during_a_lookup_by_id_is_not_cached(make_user):
+    user = make_user('author')
+
+    with invalidate_after_query(user):
+        assert User.get_by_id(user.id).username == 'author'
+
+    assert user_cache.get(User, id=user.id) is None
+
+
+def test_user_invalidated_during_a_lookup_by_username_is_not_cached(make_user):
+    user = make_user('author')
+
+    with invalidate_after_query(user):
+        assert User.get_by_username('author').id == user.id
+
+    assert user_cache.get(User, username='author') is None
+
+
+def test_renaming_a_user_invalidates_lookups_by_the_old_username(make_user):
+    user = make_user('author')
+    User.get_by_username('author')
+
+    user.username = 'writer'
+    user.save()
+
+    assert User.get_by_username('author') is None
+    assert User.get_by_username('writer').id == user.id
@@ -0,0 +1,97 @@
+import os
+from datetime import datetime, timedelta
+
+import tasks
+from extensions import db, image_set
+from models.blog import Recipe
+from models.email import OutboundEmail
+from models.image_blob import ImageBlob
+from models.image_job import ImageJob
+
+
+def make_job(user, target_id=1, **kwargs):
+    job = ImageJob(folder='recipes', target_id=target_id, source='source.jpg', digest='digest', user_id=user.id, **kwargs)
+    job.save()
+    return job
+
+
+def test_claim_next_reclaims_expired_jobs(app, make_user):
+    user = make_user('owner')
+    stale = make_job(user, status='processing', attempts=1,
+                     claimed_at=datetime.utcnow() - timedelta(seconds=app.config['IMAGE_JOB_LEASE'] + 1))
+    make_job(user, status='processing', attempts=1, claimed_at=datetime.utcnow())
+
+    job = ImageJob.claim_next(lease=app.config['IMAGE_JOB_LEASE'])
+
+    assert job.id == stale.id
+    assert job.attempts == 2
+    assert ImageJob.claim_next(lease=app.config['IMAGE_JOB_LEASE']) is None
+
+
+def test_run_image_job_fails_job_on_unexpected_error(app, make_user, monkeypatch):
+    job = make_job(make_user('owner'))
+    job = ImageJob.claim_next(lease=app.config['IMAGE_JOB_LEASE'])
+    source = image_set.path(filename=job.source, folder=job.folder)
+    os.makedirs(os.path.dirname(source), exist_ok=True)
+    open(source, 'wb').close()
+
+    def explode(job):
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr(tasks, 'process_image_job', explode)
+    tasks.run_image_job(job, max_attempts=3)
+
+    assert ImageJob.get_by_id(job.id).status == 'failed'
+    assert ImageJob.get_by_id(job.id).error == 'boom'
+    assert not os.path.exists(source)
+
+
+def test_run_image_job_gives_up_after_max_attempts(app, make_user):
+    job = make_job(make_user('owner'), attempts=3)
+    job = ImageJob.claim_next(lease=app.config['IMAGE_JOB_LEASE'])
+
+    tasks.run_image_job(job, max_attempts=3)
+
+    assert ImageJob.get_by_id(job.id).status == 'failed'
+    assert ImageJob.get_by_id(job.id).error == 'Too many attempts'
+
+
+def make_email(recipient, **kwargs):
+    email = OutboundEmail(recipient=recipient, subject='Subject', text='Text', **kwargs)
+    email.save()
+    return email
+
+
+def test_claim_due_reclaims_expired_emails(app):
+    lease = app.config['EMAIL_SEND_LEASE']
+    expired = datetime.utcnow() - timedelta(seconds=lease + 1)
+
+    stale = make_email('stale@example.com', status='sending', claimed_at=expired)
+    make_email('sending@example.com', status='sending', claimed_at=datetime.utcnow())
+    exhausted = make_email('exhausted@example.com', status='sending', claimed_at=expired, attempts=4)
+
+    emails = OutboundEmail.claim_due(limit=10, lease=lease, max_attempts=5)
+
+    assert [email.id for email in emails] == [stale.id]
+    assert emails[0].attempts == 1
+    assert OutboundEmail.query.get(exhausted.id).status == 'failed'
+
+
+def test_failed_target_update_releases_the_blob(app, make_user, make_recipe, monkeypatch):
+    user = make_user('owner')
+    recipe = make_recipe('Soup', user)
+    db.session.add(ImageBlob(folder='recipes', digest='digest', renditions={'64': {'jpeg': 'digest_64.jpg'}},
+                             ref_count=1))
+    db.session.commit()
+    job = make_job(user, target_id=recipe.id)
+    job = ImageJob.claim_next(lease=app.config['IMAGE_JOB_LEASE'])
+
+    def explode(self):
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr(Recipe, 'save', explode)
+    tasks.run_image_job(job, max_attempts=3)
+
+    assert ImageJob.get_by_id(job.id).status == 'failed'
+    assert ImageBlob.query.filter_by(digest='digest').one().ref_count == 1
+    assert Recipe.query.get(recipe.id).cover_image is None
@@ -0,0 +1,104 @@
+import pickle
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from caching import clear_cache, get_versions, use_primary_if_cleared
+from extensions import db
+
+
+class UserCache:
+
+    def __init__(self):
+        self.capacity = 1000
+        self.ttl = 60
+        self._entries = OrderedDict()
+        self._usernames = {}
+        self._lock = Lock()
+
+    def init_app(self, app):
+        self.capacity = app.config['USER_CACHE_SIZE']
+        self.ttl = app.config['USER_CACHE_TTL']
+
+    def get(self, model, id=None, username=None):
+        with self._lock:
+            if id is None:
+                id = self._usernames.get(username)
+
+            entry = self._entries.get(id)
+
+            if entry is None:
+                return None
+
+            expires_at, namespace, version, cached_username, state = entry
+
+            if expires_at <= time.monotonic():
+                self._remove(id)
+                return None
+
+            self._entries.move_to_end(id)
+
+        if username is not None and cached_username != username:
+            return None
+
+        if get_versions(namespace)[0] != version:
+            with self._lock:
+                self._remove(id)
+            return None
+
+        user = model(**pickle.loads(state))
+        db.make_transient_to_detached(user)
+
+        return db.session.merge(user, load=False)
+
+    def load(self, query, id=None, username=None):
+        namespace = self._namespace(id=id, username=username)
+        version = get_versions(namespace)[0]
+
+        use_primary_if_cleared(namespace)
+
+        return self.put(query.first(), namespace, version)
+
+    def put(self, user, namespace, version):
+        if user is None or self.capacity <= 0:
+            return user
+
+        mapper = db.inspect(user).mapper
+        state = pickle.dumps({attr.key: getattr(user, attr.key) for attr in mapper.column_attrs},
+                             pickle.HIGHEST_PROTOCOL)
+
+        with self._lock:
+            self._remove(user.id)
+            self._entries[user.id] = (time.monotonic() + self.ttl, namespace, version, user.username, state)
+            self._usernames[user.username] = user.id
+
+            while len(self._entries) > self.capacity:
+                self._remove(next(iter(self._entries)))
+
+        return user
+
+    def invalidate(self, id, *usernames):
+        with self._lock:
+            self._remove(id)
+
+        clear_cache(self._namespace(id=id), *[self._namespace(username=username) for username in usernames])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._usernames.clear()
+
+    def _remove(self, id):
+        entry = self._entries.pop(id, None)
+
+        if entry is not None and self._usernames.get(entry[3]) == id:
+            del self._usernames[entry[3]]
+
+    @staticmethod
+    def _namespace(id=None, username=None):
+        if id is None:
+            return 'username:{}'.format(username)
+        return 'user:{}'.format(id)
+
+
+user_cache = UserCache()
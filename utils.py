@@ -1,23 +1,29 @@
+import hashlib
 import os
+import tempfile
 import uuid
+from functools import lru_cache
+from urllib.parse import quote
 
 from PIL import Image
 from flask_uploads import extension
 
-from passlib.hash import pbkdf2_sha256
 from itsdangerous import URLSafeTimedSerializer
 
-from flask import current_app
+from flask import current_app, request, url_for
+from werkzeug.http import http_date
 
 from extensions import image_set
+from hashing import passwords
+from instrumentation import timed
 
 
 def hash_password(password):
-    return pbkdf2_sha256.hash(password)
+    return passwords.hash(password)
 
 
 def check_password(password, hashed):
-    return pbkdf2_sha256.verify(password, hashed)
+    return passwords.verify(password, hashed)
 
 
 def generate_token(email, salt=None):
@@ -35,40 +41,205 @@ def verify_token(token, max_age=(30 * 60), salt=None):
     return email
 
 
-def save_image(image, folder):
+def make_etag(*parts):
+    parts = parts + (request.full_path, )
+    return hashlib.sha1(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def conditional_headers(etag, last_modified=None):
+    headers = {'ETag': '"{}"'.format(etag)}
+
+    if last_modified is not None:
+        headers['Last-Modified'] = http_date(last_modified)
+
+    return headers
+
+
+def is_not_modified(etag, last_modified=None):
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+
+    if request.if_modified_since and last_modified is not None:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+
+    return False
+
+
+@timed('image')
+def save_upload(image, folder):
 
     filename = '{}.{}'.format(uuid.uuid4(), extension(image.filename))
-    image_set.save(image, folder=folder, name=filename)
+    file_path = image_set.path(filename=filename, folder=folder)
+    directory = os.path.dirname(file_path)
+
+    os.makedirs(directory, exist_ok=True)
+
+    chunk_size = current_app.config['UPLOAD_CHUNK_SIZE']
+    max_size = current_app.config.get('MAX_CONTENT_LENGTH')
+    digest = hashlib.sha256()
+    written = 0
 
-    filename = compress_image(filename=filename, folder=folder)
+    with tempfile.NamedTemporaryFile(dir=directory, suffix='.upload', delete=False) as f:
+        try:
+            for chunk in iter(lambda: image.stream.read(chunk_size), b''):
+                written += len(chunk)
+                if max_size and written > max_size:
+                    raise ValueError('File is too large')
+                digest.update(chunk)
+                f.write(chunk)
 
-    return filename
+            f.flush()
+            validate_image(f.name)
+        except Exception:
+            os.remove(f.name)
+            raise
 
+    os.replace(f.name, file_path)
 
-def compress_image(filename, folder):
+    return filename, digest.hexdigest()
+
+
+def validate_image(file_path):
+
+    try:
+        with Image.open(file_path) as image:
+            width, height = image.size
+    except (OSError, Image.DecompressionBombError):
+        raise ValueError('Not a valid image')
+
+    if width * height > current_app.config['IMAGE_MAX_PIXELS']:
+        raise ValueError('Image dimensions are too large')
+
+
+def remove_image(filename, folder):
+
+    file_path = image_set.path(filename=filename, folder=folder)
+
+    if os.path.exists(file_path):
+        os.remove(file_path)
+
+
+def remove_renditions(renditions, folder):
+
+    for formats in (renditions or {}).values():
+        for filename in formats.values():
+            remove_image(filename=filename, folder=folder)
+
+
+@timed('image')
+def compress_image(filename, folder, name):
 
     file_path = image_set.path(filename=filename, folder=folder)
+    sizes = sorted(current_app.config['IMAGE_RENDITION_SIZES'], reverse=True)
+
+    validate_image(file_path)
 
     image = Image.open(file_path)
 
+    if image.format == 'JPEG':
+        image.draft('RGB', (sizes[0], sizes[0]))
+
     if image.mode != "RGB":
         image = image.convert("RGB")
 
-    if max(image.width, image.height) > 1600:
-        maxsize = (1600, 1600)
-        image.thumbnail(maxsize)
+    renditions = {}
+
+    for size in sizes:
+        image.thumbnail((size, size))
+
+        jpeg_filename = '{}_{}.jpg'.format(name, size)
+        webp_filename = '{}_{}.webp'.format(name, size)
+
+        save_rendition(image, filename=jpeg_filename, folder=folder, image_format='JPEG', optimize=True, quality=85)
+        save_rendition(image, filename=webp_filename, folder=folder, image_format='WEBP', quality=80)
 
-    compressed_filename = '{}.jpg'.format(uuid.uuid4())
-    compressed_file_path = image_set.path(filename=compressed_filename, folder=folder)
+        renditions[str(size)] = {'jpeg': jpeg_filename, 'webp': webp_filename}
 
-    image.save(compressed_file_path, optimize=True, quality=85)
+    image.close()
+
+    largest = renditions[str(sizes[0])]['jpeg']
 
     original_size = os.stat(file_path).st_size
-    compressed_size = os.stat(compressed_file_path).st_size
+    compressed_size = os.stat(image_set.path(filename=largest, folder=folder)).st_size
     percentage = round((original_size - compressed_size) / original_size * 100)
 
-    print("The file size is reduced by {}%, from {} to {}.".format(percentage, original_size, compressed_size))
+    current_app.logger.debug('The file size is reduced by %s%%, from %s to %s.', percentage, original_size,
+                             compressed_size)
 
     os.remove(file_path)
 
-    return compressed_filename
\ No newline at end of file
+    return renditions
+
+
+def save_rendition(image, filename, folder, image_format, **params):
+
+    file_path = image_set.path(filename=filename, folder=folder)
+    temp_path = '{}.tmp'.format(file_path)
+
+    image.save(temp_path, image_format, **params)
+    os.replace(temp_path, file_path)
+
+
+def select_rendition(renditions, size, image_format='jpeg'):
+
+    if not renditions or size is None:
+        return None
+
+    sizes = sorted(int(s) for s in renditions)
+    chosen = next((s for s in sizes if s >= size), sizes[-1])
+
+    return renditions[str(chosen)].get(image_format)
+
+
+def rendition_urls(renditions, folder, fallback):
+
+    urls = {}
+
+    for size in sorted(current_app.config['IMAGE_RENDITION_SIZES']):
+        formats = (renditions or {}).get(str(size))
+
+        if formats:
+            urls[str(size)] = {image_format: image_url(folder, filename) for image_format, filename in formats.items()}
+        else:
+            urls[str(size)] = {'jpeg': fallback, 'webp': None}
+
+    return urls
+
+
+def static_base_url():
+    environ = request.environ
+    base = environ.get('smilecook.static_base_url')
+
+    if base is None:
+        base = current_app.config.get('STATIC_URL') or url_for('static', filename='', _external=True)
+        base = environ['smilecook.static_base_url'] = base.rstrip('/') + '/'
+
+    return base
+
+
+@lru_cache(maxsize=4096)
+def static_path(filename):
+    return quote(filename, safe='/:')
+
+
+def static_url(filename):
+    return static_base_url() + static_path(filename)
+
+
+def image_url(folder, filename):
+    return static_base_url() + 'images/' + folder + '/' + static_path(filename)
+
+
+def picture_url(folder, image, renditions, size, default):
+    if image:
+        return image_url(folder, select_rendition(renditions, size) or image)
+    return static_url(default)
+
+
+def picture_urls(folder, image, renditions, default):
+    if image and not renditions:
+        fallback = image_url(folder, image)
+    else:
+        fallback = static_url(default)
+
+    return rendition_urls(renditions, folder=folder, fallback=fallback)
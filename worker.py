@@ -0,0 +1,8 @@
+from app import create_app
+from tasks import run_worker
+
+app = create_app()
+
+if __name__ == '__main__':
+    with app.app_context():
+        run_worker(poll_interval=app.config['WORKER_POLL_INTERVAL'])